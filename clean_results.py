@@ -1,17 +1,69 @@
-import pandas as pd
+import csv
 
-# Load the messy CSV
-df = pd.read_csv('data/results/pilot_deepseek.csv')
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv, compute as pc
+except ImportError:
+    pa = None
+    import pandas as pd
+
+INPUT_CSV = 'data/results/pilot_deepseek.csv'
+OUTPUT_CSV = 'data/results/pilot_deepseek_clean.csv'
+# Rows per pandas chunk when pyarrow is unavailable
+CHUNK_SIZE = 50_000
 
 # Keep only rows that either:
 # 1. Solved successfully, OR
 # 2. Failed for reasons OTHER than the API key error
 api_key_error = "'NoneType' object has no attribute 'get'"
-df_clean = df[~df['error'].astype(str).str.contains(api_key_error, na=False)]
 
-# Save cleaned version
-df_clean.to_csv('data/results/pilot_deepseek_clean.csv', index=False)
 
-print(f"Original rows: {len(df)}")
-print(f"Cleaned rows: {len(df_clean)}")
-print(f"Removed: {len(df) - len(df_clean)} bad rows")
\ No newline at end of file
+def clean_with_pyarrow():
+    """Stream the CSV in record batches; returns (original_rows, cleaned_rows)."""
+    # Read every column as text so the rows we keep are written back unchanged
+    with open(INPUT_CSV, newline='', encoding='utf-8') as f:
+        columns = next(csv.reader(f))
+
+    reader = pacsv.open_csv(
+        INPUT_CSV,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in columns}),
+    )
+
+    original_rows = 0
+    cleaned_rows = 0
+    with pacsv.CSVWriter(OUTPUT_CSV, reader.schema) as writer:
+        for batch in reader:
+            is_api_key_error = pc.match_substring(batch.column('error'), api_key_error)
+            clean_batch = batch.filter(pc.invert(is_api_key_error))
+            writer.write_batch(clean_batch)
+
+            original_rows += batch.num_rows
+            cleaned_rows += clean_batch.num_rows
+    return original_rows, cleaned_rows
+
+
+def clean_with_pandas():
+    """Fallback when pyarrow is missing; returns (original_rows, cleaned_rows)."""
+    original_rows = 0
+    cleaned_rows = 0
+    # Filter the CSV in fixed-size chunks so memory stays bounded
+    reader = pd.read_csv(INPUT_CSV, chunksize=CHUNK_SIZE)
+    for i, chunk in enumerate(reader):
+        # The message is a plain literal, so skip the regex engine entirely
+        is_api_key_error = chunk['error'].astype('string').str.contains(api_key_error, regex=False, na=False)
+        clean_chunk = chunk[~is_api_key_error]
+
+        # First chunk creates the file and writes the header; the rest append
+        clean_chunk.to_csv(OUTPUT_CSV, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+
+        original_rows += len(chunk)
+        cleaned_rows += len(clean_chunk)
+    return original_rows, cleaned_rows
+
+
+original_rows, cleaned_rows = clean_with_pyarrow() if pa is not None else clean_with_pandas()
+
+print(f"Original rows: {original_rows}")
+print(f"Cleaned rows: {cleaned_rows}")
+print(f"Removed: {original_rows - cleaned_rows} bad rows")
@@ -1,6 +1,11 @@
 ﻿import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Your student-level problems
 problems = [
     {
@@ -27,7 +32,10 @@ output_file = 'data/problems/student_problems.json'
 Path(output_file).parent.mkdir(parents=True, exist_ok=True)
 
 with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(problems, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        f.write(orjson.dumps(problems, option=orjson.OPT_INDENT_2).decode('utf-8'))
+    else:
+        json.dump(problems, f, indent=2, ensure_ascii=False)
 
 print(f'Created {len(problems)} student-level problems')
 print(f'\nTo run experiment:')
@@ -6,16 +6,55 @@ Creates customized quiz sets based on your specific rule-based quiz types.
 Provides problems in a format easy for visual inspection and LaTeX typesetting.
 """
 
-import json
 import random
+from functools import reduce
+from operator import or_
 from pathlib import Path
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Iterator, Tuple
 import textwrap
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; stdlib json also accepts bytes
+    from json import loads as json_loads
+
+# One bit per rule so rule-set compatibility is a single integer test
+RULE_BITS = {rule: 1 << i for i, rule in enumerate(
+    ['&E', '&I', '→E', '→I', '↔E', '↔I', '∨E', '∨I', '¬E', '¬I', '⊥E', 'IP'])}
+# Rules outside the known set never fit any quiz type
+UNKNOWN_RULE_BIT = 1 << len(RULE_BITS)
+
+
+# Connectives in both notations, longest first so '<->' is not read as '->'
+LATEX_SYMBOLS = [('<->', '\\leftrightarrow '), ('↔', '\\leftrightarrow '), ('->', '\\to '), ('→', '\\to '),
+                 ('&', '\\land '), ('∧', '\\land '), ('|', '\\lor '), ('∨', '\\lor '),
+                 ('~', '\\neg '), ('¬', '\\neg '), ('⊥', '\\bot ')]
+
+
+def latex_formula(formula: str) -> str:
+    """Render a formula for LaTeX math mode."""
+    for symbol, command in LATEX_SYMBOLS:
+        formula = formula.replace(symbol, command)
+    return ' '.join(formula.split())
+
+
+def latex_text(text: str) -> str:
+    """Render a quiz name such as 'Basic & and →E' as LaTeX text."""
+    text = text.replace('&', '\\&')
+    for symbol, command in LATEX_SYMBOLS:
+        if not symbol.isascii():
+            text = text.replace(symbol, f'${command.strip()}$')
+    return text
+
+
+def rule_mask(rules) -> int:
+    """Encode a collection of rule names as a bitmask."""
+    return reduce(or_, (RULE_BITS.get(rule, UNKNOWN_RULE_BIT) for rule in rules), 0)
+
+
 class QuizSampler:
     def __init__(self, bank_file: str = "data/problems/enhanced_problem_bank.jsonl"):
         self.bank_file = Path(bank_file)
-        self.problems = self.load_bank()
         
         # Your exact quiz types with descriptions
         self.quiz_types = {
@@ -62,58 +101,104 @@ class QuizSampler:
                 'max_depth': 3
             }
         }
+        
+        self.quiz_masks = {quiz_type: rule_mask(config['allowed_rules'])
+                           for quiz_type, config in self.quiz_types.items()}
+    
+    def iter_bank(self) -> Iterator[Dict[str, Any]]:
+        """Stream problems from the bank file one line at a time."""
+        if not self.bank_file.exists():
+            return
+        with open(self.bank_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json_loads(line)
+    
+    def _iter_profiled(self) -> Iterator[Tuple[Dict[str, Any], Tuple[int, int, int]]]:
+        """Stream (problem, profile) pairs, profiling each problem once for every quiz type."""
+        for problem in self.iter_bank():
+            yield problem, self._profile(problem)
+    
+    @staticmethod
+    def _profile(problem: Dict[str, Any]) -> Tuple[int, int, int]:
+        """
+        (rule mask, line count, subproof depth): the metadata the compatibility
+        check reads. It is kept beside the problem rather than stored on it, so
+        callers get bank entries back unchanged.
+        """
+        metadata = problem.get('metadata', {})
+        return (rule_mask(metadata.get('rules_used', [])),
+                metadata.get('line_count', 0),
+                metadata.get('subproof_depth', 0))
     
-    def load_bank(self) -> List[Dict[str, Any]]:
-        """Load problems from bank file."""
-        problems = []
-        if self.bank_file.exists():
-            with open(self.bank_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        problems.append(json.loads(line))
-        return problems
+    def is_compatible(self, problem: Dict[str, Any], quiz_type: str) -> bool:
+        """Check whether a problem fits the rules and difficulty limits of a quiz type."""
+        return self._fits(self._profile(problem), quiz_type)
     
-    def get_problems_by_quiz_type(self, quiz_type: str) -> List[Dict[str, Any]]:
-        """Get all problems compatible with a specific quiz type."""
+    def _fits(self, profile: Tuple[int, int, int], quiz_type: str) -> bool:
         quiz_config = self.quiz_types[quiz_type]
+        mask, line_count, subproof_depth = profile
         
-        compatible = []
-        for problem in self.problems:
-            problem_rules = set(problem.get('metadata', {}).get('rules_used', []))
-            metadata = problem.get('metadata', {})
-            
-            # Check rule compatibility
-            if not problem_rules.issubset(quiz_config['allowed_rules']):
-                continue
-            
-            # Check difficulty constraints
-            if quiz_config['max_lines'] and metadata.get('line_count', 0) > quiz_config['max_lines']:
-                continue
-            if quiz_config['max_depth'] and metadata.get('subproof_depth', 0) > quiz_config['max_depth']:
-                continue
-            
-            compatible.append(problem)
+        # Check rule compatibility
+        if mask & ~self.quiz_masks[quiz_type]:
+            return False
         
-        return compatible
-    
-    def create_quiz(self, quiz_type: str, num_problems: int = 3) -> List[Dict[str, Any]]:
-        """Create a quiz with specified number of problems."""
-        compatible_problems = self.get_problems_by_quiz_type(quiz_type)
+        # Check difficulty constraints
+        if quiz_config['max_lines'] and line_count > quiz_config['max_lines']:
+            return False
+        if quiz_config['max_depth'] and subproof_depth > quiz_config['max_depth']:
+            return False
         
+        return True
+    
+    def get_problems_by_quiz_type(self, quiz_type: str) -> Iterator[Dict[str, Any]]:
+        """Lazily yield all problems compatible with a specific quiz type."""
+        for problem, profile in self._iter_profiled():
+            if self._fits(profile, quiz_type):
+                yield problem
+    
+    def _sample(self, quiz_type: str, compatible_problems: List[Dict[str, Any]],
+                num_problems: int) -> List[Dict[str, Any]]:
         if len(compatible_problems) < num_problems:
             print(f"Warning: Only {len(compatible_problems)} problems available for {quiz_type}")
             return compatible_problems
         
         return random.sample(compatible_problems, num_problems)
     
+    def create_quiz(self, quiz_type: str, num_problems: int = 3) -> List[Dict[str, Any]]:
+        """Create a quiz with specified number of problems."""
+        compatible_problems = list(self.get_problems_by_quiz_type(quiz_type))
+        return self._sample(quiz_type, compatible_problems, num_problems)
+    
     def create_progressive_quiz_set(self, num_per_type: int = 3) -> Dict[str, List[Dict[str, Any]]]:
-        """Create a complete set of quizzes across all types (for a full course)."""
-        quiz_set = {}
+        """Create a complete set of quizzes across all types (for a full course).
         
-        for quiz_type in self.quiz_types:
-            quiz_set[quiz_type] = self.create_quiz(quiz_type, num_per_type)
+        The bank is read once and each problem is offered to the reservoir of every
+        quiz type it fits (Algorithm R), so only num_per_type problems are kept per type.
+        """
+        reservoirs = {quiz_type: [] for quiz_type in self.quiz_types}
+        seen = dict.fromkeys(self.quiz_types, 0)
         
-        return quiz_set
+        for problem, profile in self._iter_profiled():
+            for quiz_type, reservoir in reservoirs.items():
+                if not self._fits(profile, quiz_type):
+                    continue
+                seen[quiz_type] += 1
+                if len(reservoir) < num_per_type:
+                    reservoir.append(problem)
+                else:
+                    j = random.randrange(seen[quiz_type])
+                    if j < num_per_type:
+                        reservoir[j] = problem
+        
+        for quiz_type, reservoir in reservoirs.items():
+            if seen[quiz_type] < num_per_type:
+                print(f"Warning: Only {seen[quiz_type]} problems available for {quiz_type}")
+            else:
+                # Reservoir slots keep bank order for early items; shuffle like random.sample
+                random.shuffle(reservoir)
+        
+        return reservoirs
     
     def print_quiz(self, quiz_type: str, problems: List[Dict[str, Any]], show_solutions: bool = False):
         """Print a beautifully formatted quiz."""
@@ -159,9 +244,19 @@ class QuizSampler:
             "\\usepackage{amsmath, amssymb}",
             "\\usepackage{logicproof}",
             "\\usepackage[margin=1in]{geometry}",
-            "\\title{Fitch Proof Quiz: " + quiz_config['name'] + "}",
+            "\\title{Fitch Proof Quiz: " + latex_text(quiz_config['name']) + "}",
             "\\author{Logic Course}",
             "\\date{}",
             "\\begin{document}",
             "\\maketitle",
-            "\\noindent\\textbf{Instructions:} Prove each of
\ No newline at end of file
+            "\\noindent\\textbf{Instructions:} Prove each of the following arguments "
+            "using Fitch-style natural deduction.",
+            "\\begin{enumerate}",
+        ]
+        for problem in problems:
+            premises = ", ".join(latex_formula(premise) for premise in problem['premises'])
+            latex_content.append(f"  \\item ${premises} \\vdash {latex_formula(problem['conclusion'])}$")
+        latex_content += ["\\end{enumerate}", "\\end{document}"]
+        
+        Path(output_file).write_text("\n".join(latex_content) + "\n", encoding='utf-8')
+        print(f"LaTeX quiz written to {output_file}")
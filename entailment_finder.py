@@ -1,8 +1,15 @@
 import random
 import itertools
-from pysat.solvers import Glucose3
-from pysat.formula import WCNF
+from functools import lru_cache, reduce
+from operator import and_
+import numpy as np
+try:
+    from pysat.solvers import Glucose3
+except ImportError:
+    Glucose3 = None  # only needed when ATOMS is too large for truth tables
 from src.symbol_standardizer import standardize_symbols
+from src.formula_parser import (ATOM_NODE, UNARY_NODE, BINARY_NODE, parse_formula, fold_ast,
+                                ast_to_str)
 
 # --- Configuration based on our specifications ---
 ATOMS = ['P', 'Q', 'R', 'S']
@@ -13,196 +20,578 @@ CONNECTIVES = {
 MAX_DEPTH = 2
 NUM_PREMISES_RANGE = (2, 3)
 TARGET_ENTAILMENTS = 10
+# Draws allowed per formula when repeats have to be replaced (draw_distinct);
+# a redraw is much cheaper than throwing away the whole candidate
+DRAWS_PER_FORMULA = 4
+# Largest formula space generate_formula tabulates instead of building each draw
+MAX_FORMULA_TABLE = 1 << 16
 
 # A global mapping from atom names to integer variables for the SAT solver
 ATOM_MAP = {atom: i + 1 for i, atom in enumerate(ATOMS)}
+NUM_ATOMS = len(ATOM_MAP)
 
-def generate_formula(depth):
-    """Recursively generates a random well-formed formula string."""
-    if depth <= 0 or random.random() < 0.25: # Chance to terminate early
-        return random.choice(ATOMS)
+# Truth tables over all 2**NUM_ATOMS worlds, packed into one int per formula:
+# bit w is set when the formula is true in world w (atom i is true iff bit i of w is)
+NUM_WORLDS = 1 << NUM_ATOMS
+FULL_MASK = (1 << NUM_WORLDS) - 1
+ATOM_MASKS = {atom: sum(1 << w for w in range(NUM_WORLDS) if w >> i & 1)
+              for i, atom in enumerate(ATOMS)}
 
-    op_type = random.choice(['binary', 'unary'])
+# The same truth tables split into little-endian uint64 words for numpy,
+# so a pool of them stays a plain integer array whatever the number of worlds
+MASK_WORDS = (NUM_WORLDS + 63) // 64
 
-    if op_type == 'unary':
-        op = random.choice(CONNECTIVES['unary'])
-        sub_formula = generate_formula(depth - 1)
-        return f"({op}{sub_formula})"
-    else: # binary
-        op = random.choice(CONNECTIVES['binary'])
-        left = generate_formula(depth - 1)
-        right = generate_formula(depth - 1)
-        return f"({left} {op} {right})"
+def mask_words(mask):
+    """Splits a truth mask into MASK_WORDS uint64 words (lowest worlds first)."""
+    return np.array([(mask >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(MASK_WORDS)],
+                    dtype=np.uint64)
 
-def formula_to_clauses(formula_str, cnf_writer, top_var_ref):
+# Truth tables are a handful of int ops for small ATOMS; past this, use SAT
+MAX_TRUTH_TABLE_ATOMS = 12
+USE_TRUTH_TABLES = NUM_ATOMS <= MAX_TRUTH_TABLE_ATOMS
+if not USE_TRUTH_TABLES and Glucose3 is None:
+    raise ImportError(f"python-sat is required for more than {MAX_TRUTH_TABLE_ATOMS} atoms")
+
+def generate_formula_ast(depth, connectives=CONNECTIVES):
+    """
+    Generates a random well-formed formula as a tuple AST using only the given connectives.
+    """
+    return _generate(depth, connectives, False)[0]
+
+def generate_formula_and_mask(depth, connectives=CONNECTIVES):
+    """
+    Like generate_formula_ast, but also returns the formula's truth mask,
+    built alongside the tree so it never has to be walked (or hashed) again.
+    Returns (ast, mask); draws the same random numbers as generate_formula_ast.
+    """
+    return _generate(depth, connectives, True)
+
+def _generate(depth, connectives, with_mask):
+    """
+    Works from an explicit stack of pending items: an int is a subformula still
+    to be generated with that depth budget, a (tag, op) pair builds a node from
+    the subformulas generated just before it (and, with_mask, their masks).
+    """
+    # The set of available operator types ('unary', 'binary') depends on the chosen bundle
+    available_op_types = list(connectives.keys())
+    # Bind the hot lookups once per formula instead of once per node.
+    # Picks index with a single random() call, about half the cost of random.choice
+    rand = random.random
+    atoms, unary, binary = ATOMS, connectives.get('unary') or (), connectives.get('binary') or ()
+    n_types, n_atoms, n_unary, n_binary = len(available_op_types), len(atoms), len(unary), len(binary)
+    nodes = []
+    masks = []
+    stack = [depth]
+
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, int):
+            tag, op = item
+            if tag == UNARY_NODE:
+                nodes[-1] = (UNARY_NODE, op, nodes[-1])
+                if with_mask:
+                    masks[-1] = ~masks[-1] & FULL_MASK
+            else:
+                right = nodes.pop()
+                nodes[-1] = (BINARY_NODE, op, nodes[-1], right)
+                if with_mask:
+                    right = masks.pop()
+                    masks[-1] = combine_masks(op, masks[-1], right)
+        # Bottom of the budget, a chance to terminate early, or nothing to choose from
+        elif item <= 0 or rand() < 0.25 or not n_types:
+            atom = atoms[int(rand() * n_atoms)]
+            nodes.append((ATOM_NODE, atom))
+            if with_mask:
+                masks.append(ATOM_MASKS[atom])
+        elif available_op_types[int(rand() * n_types)] == 'unary':
+            stack += ((UNARY_NODE, unary[int(rand() * n_unary)]), item - 1)
+        else: # binary
+            op = binary[int(rand() * n_binary)]
+            # Pushed in reverse so the left subformula is generated first
+            stack += ((BINARY_NODE, op), item - 1, item - 1)
+
+    return nodes[0], masks[0] if with_mask else None
+
+def generate_formula(depth, connectives=CONNECTIVES):
+    """
+    Generates a random well-formed formula string using only the given connectives.
+    Small formula spaces are tabulated once (see _formula_distribution) and
+    sampled directly, with the same distribution as generate_formula_ast.
+    """
+    table = _formula_distribution(depth, tuple((op_type, tuple(ops)) for op_type, ops in connectives.items()))
+    if table is None:
+        return ast_to_str(generate_formula_ast(depth, connectives))
+    formulas, cumulative = table
+    return random.choices(formulas, cum_weights=cumulative)[0]
+
+@lru_cache(maxsize=None)
+def _formula_distribution(depth, connectives_key):
+    """
+    Every formula string _generate can produce with this depth budget, with the
+    exact probability of drawing it, as (formulas, cumulative weights).
+    Returns None when there would be more than MAX_FORMULA_TABLE formulas.
+    """
+    op_types = [ops for _, ops in connectives_key]
+    unary = dict(connectives_key).get('unary') or ()
+    binary = dict(connectives_key).get('binary') or ()
+    n_atoms = len(ATOMS)
+
+    size = n_atoms
+    for _ in range(depth):
+        if op_types:
+            size = n_atoms + len(unary) * size + len(binary) * size * size
+        if size > MAX_FORMULA_TABLE:
+            return None
+
+    # Each formula string comes from exactly one sequence of choices, so the
+    # levels are built without merging: (formula, probability) pairs per budget
+    level = [(atom, 1 / n_atoms) for atom in ATOMS]
+    for _ in range(depth):
+        if not op_types:
+            break
+        p_atom, p_type = 0.25 / n_atoms, 0.75 / len(op_types)
+        next_level = [(atom, p_atom) for atom in ATOMS]
+        for op in unary:
+            p_op = p_type / len(unary)
+            next_level += ((f"({op}{sub})", p_op * p) for sub, p in level)
+        for op in binary:
+            p_op = p_type / len(binary)
+            next_level += ((f"({left} {op} {right})", p_op * p_left * p_right)
+                           for left, p_left in level for right, p_right in level)
+        level = next_level
+
+    formulas, weights = zip(*level)
+    return formulas, list(itertools.accumulate(weights))
+
+def draw_distinct(draw, count):
+    """
+    Calls draw() for (formula, data) pairs until count distinct formulas are
+    found, keeping them in generation order and redrawing on a repeat instead
+    of giving up the attempt. Stops after DRAWS_PER_FORMULA * count draws, so
+    the result may be short. Returns a dict of formula -> data.
+    """
+    found = {}
+    for _ in range(count * DRAWS_PER_FORMULA):
+        if len(found) == count:
+            break
+        formula, data = draw()
+        found.setdefault(formula, data)
+    return found
+
+def generate_distinct_formulas(depth, count, connectives=CONNECTIVES):
+    """Up to count distinct formula strings, in generation order (see draw_distinct)."""
+    return list(draw_distinct(lambda: (generate_formula(depth, connectives), None), count))
+
+def as_ast(formula):
+    """Formulas may be given as tuple ASTs or as strings, which are parsed once and cached."""
+    return _parse_cached(formula) if isinstance(formula, str) else formula
+
+@lru_cache(maxsize=4096)
+def _parse_cached(formula_str):
+    return parse_formula(formula_str, ATOMS)
+
+# Tseitin definition clauses per connective, split by direction:
+# POSITIVE_CLAUSES encode v -> (a op b), NEGATIVE_CLAUSES encode (a op b) -> v
+POSITIVE_CLAUSES = {
+    '&': lambda v, a, b: [[-v, a], [-v, b]],
+    '|': lambda v, a, b: [[-v, a, b]],
+    '->': lambda v, a, b: [[-v, -a, b]],
+    '<->': lambda v, a, b: [[-v, -a, b], [-v, -b, a]],
+}
+NEGATIVE_CLAUSES = {
+    '&': lambda v, a, b: [[-a, -b, v]],
+    '|': lambda v, a, b: [[-a, v], [-b, v]],
+    '->': lambda v, a, b: [[a, v], [-b, v]],
+    '<->': lambda v, a, b: [[a, b, v], [-a, -b, v]],
+}
+
+def add_clauses(cnf_writer, clauses):
+    """
+    Appends one definition's clauses, dropping repeated literals, tautologies
+    (x and -x together) and repeated clauses, which appear when an operand is
+    reused, e.g. (P & P) or (P -> P). Every clause of a definition contains its
+    own variable, so clauses of different definitions can never coincide.
+    """
+    seen = set()
+    for clause in clauses:
+        key = frozenset(clause)
+        if key in seen or any(-lit in key for lit in key):
+            continue
+        seen.add(key)
+        cnf_writer.append(list(key) if len(key) < len(clause) else clause)
+
+def formula_to_clauses(node, cnf_writer, top_var_ref, memo=None, polarity=0):
     """
-    Parses a formula string and adds its CNF representation to a WCNF object.
-    This is a simple parser that works for our generated formulas.
+    Appends the CNF clauses of a tuple AST formula to the cnf_writer list.
+    The tree is walked directly, so there is no text to scan or parse.
     It returns the integer literal representing the top-level formula.
     
     The 'top_var_ref' is a list containing the current top variable, e.g., [4],
     which allows us to modify it by reference.
+
+    If a 'memo' dict is given, it maps (op, a, b) to the variable already
+    defined for that subformula, so repeated subformulas are encoded once.
+    Share one memo across every formula that goes into the same solver.
+
+    'polarity' is +1 if the returned literal will only be asserted true, -1 if
+    only asserted false, and 0 otherwise. With a known polarity only the half
+    of each definition that can matter is emitted (Plaisted-Greenbaum).
+    """
+    encode = tseitin_encoder(cnf_writer, top_var_ref, {} if memo is None else memo)
+    return encode(node, polarity)
+
+def tseitin_encoder(cnf_writer, top_var_ref, memo):
     """
-    formula_str = formula_str.strip()
-
-    # Base case: It's just an atom
-    if formula_str in ATOM_MAP:
-        return ATOM_MAP[formula_str]
-
-    # It's a complex formula, so it must be parenthesized
-    if formula_str.startswith('(') and formula_str.endswith(')'):
-        # Strip outer parentheses
-        content = formula_str[1:-1]
-
-        # Handle unary negation
-        if content.startswith('~'):
-            sub_formula = content[1:]
-            sub_literal = formula_to_clauses(sub_formula, cnf_writer, top_var_ref)
-            return -sub_literal
-
-        # Handle binary connectives by finding the main operator
-        balance = 0
-        split_idx = -1
-        for i, char in enumerate(content):
-            if char == '(':
-                balance += 1
-            elif char == ')':
-                balance -= 1
-            elif char in ' &|-' and balance == 0:
-                if content[i:i+3] == '<->':
-                    split_idx = i
-                    break
-                if content[i:i+2] == '->':
-                    split_idx = i
-                    break
-                if content[i] in ['&', '|']:
-                    split_idx = i
-                    break
-        
-        op_str = content[split_idx:].split()[0]
-        left_str = content[:split_idx].strip()
-        right_str = content[split_idx + len(op_str):].strip()
-
-        # Recursively get literals for subformulas
-        a = formula_to_clauses(left_str, cnf_writer, top_var_ref)
-        b = formula_to_clauses(right_str, cnf_writer, top_var_ref)
-        
-        # *** THE FIX IS HERE ***
-        # Instead of calling a method, we manually increment our own variable counter.
-        top_var_ref[0] += 1
-        v = top_var_ref[0]
+    Returns encode(node, polarity), which does formula_to_clauses' work with
+    the clause list, variable counter and memo bound once. Reuse one encoder
+    for every formula fed to the same solver.
+    """
+    # Bind the hot lookups once per encoder instead of once per node
+    atom_map, memo_get = ATOM_MAP, memo.get
+    positive_clauses, negative_clauses = POSITIVE_CLAUSES, NEGATIVE_CLAUSES
+
+    def encode(node, polarity):
+        tag = node[0]
+        if tag == ATOM_NODE:
+            if node[1] not in atom_map:
+                raise ValueError(f"Unknown atom {node[1]!r} in formula")
+            return atom_map[node[1]]
+        if tag == UNARY_NODE:
+            return -encode(node[2], -polarity)
+        if tag != BINARY_NODE:
+            raise ValueError(f"Unknown formula node: {node!r}")
+
+        op_str = node[1]
+        if op_str == '<->':
+            left_polarity = right_polarity = 0
+        elif op_str == '->':
+            left_polarity, right_polarity = -polarity, polarity
+        else:
+            left_polarity = right_polarity = polarity
+        a = encode(node[2], left_polarity)
+        b = encode(node[3], right_polarity)
+
+        # Equal operands mean an equal subformula: reuse its variable and
+        # only add the directions of its definition not emitted yet
+        key = (op_str, a, b)
+        entry = memo_get(key)
+        if entry is None:
+            top_var_ref[0] += 1
+            entry = memo[key] = [top_var_ref[0], False, False]
+        v = entry[0]
 
         # Add clauses that define v <=> (a op b) using Tseitin transformation
-        if op_str == '&':
-            cnf_writer.append([-v, a])
-            cnf_writer.append([-v, b])
-            cnf_writer.append([-a, -b, v])
-        elif op_str == '|':
-            cnf_writer.append([-v, a, b])
-            cnf_writer.append([-a, v])
-            cnf_writer.append([-b, v])
-        elif op_str == '->': # v <=> (~a | b)
-            cnf_writer.append([-v, -a, b])
-            cnf_writer.append([a, v])
-            cnf_writer.append([-b, v])
-        elif op_str == '<->': # v <=> (a <-> b)
-            cnf_writer.append([-v, -a, b])
-            cnf_writer.append([-v, -b, a])
-            cnf_writer.append([a, b, v])
-            cnf_writer.append([-a, -b, v])
+        if polarity >= 0 and not entry[1]:
+            add_clauses(cnf_writer, positive_clauses[op_str](v, a, b))
+            entry[1] = True
+        if polarity <= 0 and not entry[2]:
+            add_clauses(cnf_writer, negative_clauses[op_str](v, a, b))
+            entry[2] = True
         return v
-    raise ValueError(f"Could not parse formula: {formula_str}")
+
+    return encode
+
+def combine_masks(op_str, a, b):
+    """Truth table of (a op b) from the truth tables of a and b."""
+    if op_str == '&':
+        return a & b
+    elif op_str == '|':
+        return a | b
+    elif op_str == '->':
+        return (~a | b) & FULL_MASK
+    elif op_str == '<->':
+        return ~(a ^ b) & FULL_MASK
+    raise ValueError(f"Unknown connective: {op_str}")
+
+def negate_mask(a):
+    return ~a & FULL_MASK
+
+# Truth masks of every compound subformula seen so far, shared across formulas
+SUBFORMULA_MASKS = {}
+MAX_SUBFORMULA_MASKS = 1 << 16
+
+@lru_cache(maxsize=4096)
+def truth_mask(formula):
+    """
+    Evaluates a formula (AST or string) under every assignment to ATOMS at once.
+    Bit w of the result is set when the formula is true in world w.
+    """
+    if len(SUBFORMULA_MASKS) > MAX_SUBFORMULA_MASKS:
+        SUBFORMULA_MASKS.clear()
+    return fold_ast(as_ast(formula), ATOM_MASKS, negate_mask, combine_masks, SUBFORMULA_MASKS)
+
+def enumerate_formulas(max_depth, connectives=CONNECTIVES):
+    """
+    Enumerates every formula up to max_depth, in generate_formula's format,
+    keeping only the shortest formula for each distinct truth table.
+    Returns a dict mapping truth mask -> formula string.
+    """
+    formulas_by_mask = {}
+
+    def keep(mask, formula):
+        best = formulas_by_mask.get(mask)
+        if best is None or len(formula) < len(best):
+            formulas_by_mask[mask] = formula
+
+    for atom in ATOMS:
+        keep(ATOM_MASKS[atom], atom)
+
+    # Each level only combines one representative per truth table
+    for _ in range(max_depth):
+        pool = list(formulas_by_mask.items())
+        for op in connectives.get('unary', []):
+            for mask, formula in pool:
+                keep(negate_mask(mask), f"({op}{formula})")
+        for op in connectives.get('binary', []):
+            for left_mask, left in pool:
+                for right_mask, right in pool:
+                    keep(combine_masks(op, left_mask, right_mask), f"({left} {op} {right})")
+    return formulas_by_mask
+
+def masks_necessary(premise_masks, conclusion_mask):
+    """Checks that dropping any one premise breaks the entailment."""
+    if len(premise_masks) < 2:
+        return True
+    for i in range(len(premise_masks)):
+        rest = reduce(and_, premise_masks[:i] + premise_masks[i+1:])
+        if not rest & ~conclusion_mask:
+            return False
+    return True
+
+def encode_formulas(formulas, polarities):
+    """
+    Encodes formulas (ASTs or strings) into one clause list with a shared
+    memo, so a subformula that occurs in several of them is defined once.
+    polarities gives +1/-1/0 per formula, as for formula_to_clauses.
+    Returns (clauses, literals, top_var), with one literal per formula.
+    """
+    clauses = []
+    top_var_ref = [NUM_ATOMS]
+    encode = tseitin_encoder(clauses, top_var_ref, {})
+    lits = [encode(as_ast(f), polarity) for f, polarity in zip(formulas, polarities)]
+    return clauses, lits, top_var_ref[0]
+
+def cheap_entail(premises, conclusion):
+    """
+    Syntactic shortcut tried before the SAT solver: the conclusion, or every
+    conjunct of it, is a premise or a conjunct of an &-rooted premise.
+    Returns the set of premise indices such a proof uses, or None if it fails
+    (which proves nothing either way).
+    """
+    known = {}
+    for i, premise in enumerate(premises):
+        stack = [as_ast(premise)]
+        while stack:
+            node = stack.pop()
+            known.setdefault(node, i)
+            if node[0] == BINARY_NODE and node[1] == '&':
+                stack += (node[2], node[3])
+
+    used = set()
+    stack = [as_ast(conclusion)]
+    while stack:
+        node = stack.pop()
+        if node in known:
+            used.add(known[node])
+        elif node[0] == BINARY_NODE and node[1] == '&':
+            stack += (node[2], node[3])
+        else:
+            return None
+    return used
 
 def check_entailment(premises, conclusion):
-    """Checks if premises entail the conclusion using a SAT solver."""
-    wcnf = WCNF()
-    # *** THE FIX IS HERE ***
-    # Initialize our variable counter. It must be a list to be passed by reference.
-    top_var_list = [len(ATOM_MAP)]
+    """Checks if premises entail the conclusion using truth tables (or a SAT solver)."""
+    if USE_TRUTH_TABLES:
+        combined = reduce(and_, map(truth_mask, premises), FULL_MASK)
+        return not combined & ~truth_mask(conclusion)
+    if cheap_entail(premises, conclusion) is not None:
+        return True
+    # Neither order nor repeats of premises matter, so key the cache on a frozenset
+    return _entails_cached(frozenset(map(as_ast, premises)), as_ast(conclusion))
+
+def check_contradiction(premises):
+    """Checks if a set of premises is self-contradictory."""
+    if USE_TRUTH_TABLES:
+        return not reduce(and_, map(truth_mask, premises), FULL_MASK)
+    return _contradicts_cached(frozenset(map(as_ast, premises)))
+
+@lru_cache(maxsize=8192)
+def _entails_cached(premises, conclusion):
+    # Premises are only asserted true and the conclusion only false
+    clauses, lits, _ = encode_formulas([*premises, conclusion], [1] * len(premises) + [-1])
     
     # Add premises as hard clauses (they must be true)
-    for p in premises:
-        p_lit = formula_to_clauses(p, wcnf, top_var_list)
-        wcnf.append([p_lit])
+    clauses += [[p_lit] for p_lit in lits[:-1]]
 
     # Add the NEGATION of the conclusion as a hard clause
-    c_lit = formula_to_clauses(conclusion, wcnf, top_var_list)
-    wcnf.append([-c_lit])
+    clauses.append([-lits[-1]])
     
     # Check for unsatisfiability
-    with Glucose3(bootstrap_with=wcnf.hard) as g:
+    with Glucose3(bootstrap_with=clauses) as g:
         return not g.solve()
 
-def check_contradiction(premises):
-    """Checks if a set of premises is self-contradictory."""
-    wcnf = WCNF()
-    # *** THE FIX IS HERE ***
-    top_var_list = [len(ATOM_MAP)]
-    for p in premises:
-        p_lit = formula_to_clauses(p, wcnf, top_var_list)
-        wcnf.append([p_lit])
+@lru_cache(maxsize=8192)
+def _contradicts_cached(premises):
+    clauses, lits, _ = encode_formulas(premises, [1] * len(premises))
+    clauses += [[p_lit] for p_lit in lits]
     
-    with Glucose3(bootstrap_with=wcnf.hard) as g:
+    with Glucose3(bootstrap_with=clauses) as g:
         return not g.solve()
 
+def _gated_encoding(premises, conclusion):
+    """
+    Encodes premises and the negated conclusion once, each behind its own
+    selector variable (clauses [-s_i, p_i] and [-s_c, -c]), so one solver can
+    answer several related queries by choosing which selectors to assume.
+    Returns (clauses, premise_selectors, conclusion_selector).
+    """
+    clauses, lits, top_var = encode_formulas(list(premises) + [conclusion],
+                                             [1] * len(premises) + [-1])
+    selectors = list(range(top_var + 1, top_var + len(lits) + 1))
+    clauses += [[-s, p_lit] for s, p_lit in zip(selectors, lits[:-1])]
+    clauses.append([-selectors[-1], -lits[-1]])
+    return clauses, selectors[:-1], selectors[-1]
+
+def _dropped_premise_entails(g, premise_selectors, conclusion_selector, core=None):
+    """
+    True if some premise can be switched off and the rest still entail the conclusion.
+    core is the UNSAT core from solving with every selector assumed, if known:
+    a premise outside it is redundant without another solve. The core need
+    not be minimal, so premises inside it still get their own query.
+    """
+    if core is not None and not set(premise_selectors) <= set(core):
+        return True
+    for i in range(len(premise_selectors)):
+        # UNSAT means the other premises still entail the conclusion
+        if not g.solve(assumptions=premise_selectors[:i] + premise_selectors[i+1:]
+                       + [conclusion_selector]):
+            return True
+    return False
+
+def check_premises_necessary(premises, conclusion):
+    """
+    Checks that every premise is needed for the entailment, i.e. that no
+    subset missing one premise still entails the conclusion.
+    All premises are encoded once behind selector variables and a single
+    solver is queried under assumptions that switch off one premise at a time.
+    """
+    if len(premises) < 2:
+        return True
+    if USE_TRUTH_TABLES:
+        return masks_necessary([truth_mask(p) for p in premises], truth_mask(conclusion))
+    # A syntactic proof from only some premises already shows one is redundant
+    used = cheap_entail(premises, conclusion)
+    if used is not None and len(used) < len(premises):
+        return False
+    # A repeated premise is never necessary, so order is all the cache key may drop
+    return _necessary_cached(tuple(sorted(map(as_ast, premises))), as_ast(conclusion))
+
+@lru_cache(maxsize=8192)
+def _necessary_cached(premises, conclusion):
+    clauses, premise_selectors, conclusion_selector = _gated_encoding(premises, conclusion)
+    with Glucose3(bootstrap_with=clauses) as g:
+        # Without the entailment there is nothing to drop premises from
+        if g.solve(assumptions=premise_selectors + [conclusion_selector]):
+            return True
+        return not _dropped_premise_entails(g, premise_selectors, conclusion_selector,
+                                            g.get_core())
+
+def masks_candidate(premise_masks, conclusion_mask):
+    """check_candidate on truth masks that are already computed."""
+    combined = reduce(and_, premise_masks, FULL_MASK)
+    return (not combined & ~conclusion_mask and combined != 0
+            and masks_necessary(premise_masks, conclusion_mask))
+
+def check_candidate(premises, conclusion):
+    """
+    Runs all three filters on a candidate at once: the premises entail the
+    conclusion, are not self-contradictory, and are each necessary.
+    On the SAT path one encoding and one solver answer every query, so
+    clauses learned by the first solve are reused by the rest.
+    """
+    if USE_TRUTH_TABLES:
+        return masks_candidate([truth_mask(p) for p in premises], truth_mask(conclusion))
+    used = cheap_entail(premises, conclusion)
+    if used is not None and len(used) < len(premises):
+        return False
+    return _candidate_cached(tuple(sorted(map(as_ast, premises))), as_ast(conclusion))
+
+@lru_cache(maxsize=8192)
+def _candidate_cached(premises, conclusion):
+    clauses, premise_selectors, conclusion_selector = _gated_encoding(premises, conclusion)
+    with Glucose3(bootstrap_with=clauses) as g:
+        # SAT means a world where every premise holds and the conclusion fails
+        if g.solve(assumptions=premise_selectors + [conclusion_selector]):
+            return False
+        # Premises the refutation did not use are redundant
+        core = g.get_core()
+        # UNSAT with the conclusion switched off means the premises contradict
+        if not g.solve(assumptions=premise_selectors):
+            return False
+        if len(premise_selectors) > 1 and _dropped_premise_entails(
+                g, premise_selectors, conclusion_selector, core):
+            return False
+    return True
+
 def main():
     """Main function to find and print entailments."""
     print("--- Entailment Finder ---")
     print(f"Searching for {TARGET_ENTAILMENTS} valid, non-trivial entailments...")
     found_entailments = []
     
+    # Every distinct truth table up to MAX_DEPTH, each with its shortest formula
+    formulas_by_mask = enumerate_formulas(MAX_DEPTH)
+    masks = list(formulas_by_mask)
+    # The same pool as an (n, MASK_WORDS) array, so a premise set is tested
+    # against every conclusion at once
+    not_pool = ~np.array([mask_words(m) for m in masks], dtype=np.uint64)
+
     attempts = 0
     while len(found_entailments) < TARGET_ENTAILMENTS:
         attempts += 1
         num_premises = random.choice(NUM_PREMISES_RANGE)
-        # Use a set to avoid duplicate premises from the start
-        premises = list(set(generate_formula(MAX_DEPTH) for _ in range(num_premises)))
-        # Reroll if we got fewer premises than intended due to duplicates
-        if len(premises) < num_premises:
+        # Sampling distinct truth tables rules out duplicate (even equivalent) premises
+        premise_idx = random.sample(range(len(masks)), num_premises)
+        premise_masks = [masks[i] for i in premise_idx]
+        combined = reduce(and_, premise_masks)
+
+        # FILTER 2: Contradictory Premises
+        if not combined:
             continue
-        conclusion = generate_formula(MAX_DEPTH)
 
-        # FILTER 1: Trivial Premise (conclusion is one of the premises)
-        if conclusion in premises:
+        # Check for validity: no world makes every premise true and the conclusion false
+        keep = ~(not_pool & mask_words(combined)).any(axis=1)
+
+        # FILTER 1: Trivial Premise (conclusion is equivalent to one of the premises)
+        keep[premise_idx] = False
+
+        # FILTER 3: Unnecessary Premises (dropping any one must break the entailment)
+        if num_premises > 1:
+            for i in range(num_premises):
+                rest = reduce(and_, premise_masks[:i] + premise_masks[i+1:])
+                keep &= (not_pool & mask_words(rest)).any(axis=1)
+
+        candidates = np.flatnonzero(keep)
+        if not candidates.size:
             continue
 
-        # Check for validity
-        try:
-            is_valid = check_entailment(premises, conclusion)
-        except (ValueError, IndexError): # Catch parsing errors
-            continue 
-
-        if is_valid:
-            # FILTER 2: Contradictory Premises
-            if check_contradiction(premises):
-                continue
-            
-            # FILTER 3: Unnecessary Premises
-            is_necessary = True
-            if len(premises) > 1:
-                for i in range(len(premises)):
-                    subset_premises = premises[:i] + premises[i+1:]
-                    if check_entailment(subset_premises, conclusion):
-                        is_necessary = False
-                        break
-            if not is_necessary:
-                continue
-
-            # STANDARDIZE SYMBOLS: Convert to student-friendly format after SAT validation
-            standardized_premises = [standardize_symbols(p) for p in premises]
-            standardized_conclusion = standardize_symbols(conclusion)
-
-            # If all filters passed, we found a good one!
-            # If all filters passed, we found a good one!
-            found_entailments.append((standardized_premises, standardized_conclusion))  # ← USE STANDARDIZED!
-            print(f"\n--- Found Entailment #{len(found_entailments)} (on attempt {attempts}) ---")
-            print("Premises:")
-            for i, p in enumerate(standardized_premises):  # ← USE STANDARDIZED!
-                print(f"  {i+1}: {p}")  # ← USE STANDARDIZED!
-            print("Conclusion:")
-            print(f"  ⊢ {standardized_conclusion}")  # ← USE STANDARDIZED!
-            attempts = 0 # Reset counter for next find
-           
+        premises = [formulas_by_mask[m] for m in premise_masks]
+        conclusion = formulas_by_mask[masks[random.choice(candidates)]]
+
+        # STANDARDIZE SYMBOLS: Convert to student-friendly format after validation
+        standardized_premises = [standardize_symbols(p) for p in premises]
+        standardized_conclusion = standardize_symbols(conclusion)
+
+        # If all filters passed, we found a good one!
+        found_entailments.append((standardized_premises, standardized_conclusion))  # ← USE STANDARDIZED!
+        print(f"\n--- Found Entailment #{len(found_entailments)} (on attempt {attempts}) ---")
+        print("Premises:")
+        for i, p in enumerate(standardized_premises):  # ← USE STANDARDIZED!
+            print(f"  {i+1}: {p}")  # ← USE STANDARDIZED!
+        print("Conclusion:")
+        print(f"  ⊢ {standardized_conclusion}")  # ← USE STANDARDIZED!
+        attempts = 0 # Reset counter for next find
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
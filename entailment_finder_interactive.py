@@ -1,15 +1,22 @@
 import random
 import itertools
+import multiprocessing
+import os
 import sys
-from pysat.solvers import Glucose3
-from pysat.formula import WCNF    
+import time
+from functools import partial
 from src.symbol_standardizer import standardize_symbols
-import re
+# Generation and the entailment checks are shared with the non-interactive finder
+# (check_entailment and friends are also re-exported for the experiment scripts)
+from entailment_finder import (generate_formula, generate_distinct_formulas, generate_formula_ast,
+                               generate_formula_and_mask, draw_distinct,
+                               check_entailment, check_contradiction, check_premises_necessary,
+                               check_candidate, masks_candidate, USE_TRUTH_TABLES)
+from src.formula_parser import ast_to_str
 
 
 
 # --- Configuration ---
-ATOMS = ['P', 'Q', 'R', 'S']
 # NEW: Define all possible connectives here
 ALL_CONNECTIVES = {
     'binary': ['&', '|', '->', '<->'],
@@ -18,90 +25,61 @@ ALL_CONNECTIVES = {
 MAX_DEPTH = 2
 NUM_PREMISES_RANGE = (2, 3)
 TARGET_ENTAILMENTS = 50
+# Each search round gives every worker process this many attempts
+NUM_WORKERS = os.cpu_count() or 1
+ATTEMPTS_PER_TASK = 500
 
-# A global mapping from atom names to integer variables for the SAT solver
-ATOM_MAP = {atom: i + 1 for i, atom in enumerate(ATOMS)}
 
+def generate_candidate_formula(connectives):
+    """
+    One random formula as (ast, truth_mask); the mask is None on the SAT path,
+    where it would not be used.
+    """
+    if USE_TRUTH_TABLES:
+        # The truth mask is built during generation, so checking is pure int ops
+        return generate_formula_and_mask(MAX_DEPTH, connectives)
+    return generate_formula_ast(MAX_DEPTH, connectives), None
 
-# MODIFIED: The function now takes a 'connectives' dictionary as an argument
-def generate_formula(depth, connectives):
-    """Recursively generates a random well-formed formula string using only the allowed connectives."""
-    # The set of available operator types ('unary', 'binary') depends on the chosen bundle
-    available_op_types = list(connectives.keys())
-
-    # If we are at the bottom of recursion, or if there's a chance to terminate early
-    if depth <= 0 or random.random() < 0.25:
-        return random.choice(ATOMS)
 
-    # If there are no connectives to choose from (e.g., a custom empty set), just return an atom
-    if not available_op_types:
-        return random.choice(ATOMS)
+def find_entailments(connectives, num_attempts):
+    """
+    Runs num_attempts independent generate-and-filter attempts.
+    Returns a list of (premises, conclusion, attempts) for every candidate that
+    passed, where attempts counts the tries since the previous find in this batch.
+    """
+    found = []
+    attempts = 0
+    for _ in range(num_attempts):
+        attempts += 1
+        num_premises = random.choice(NUM_PREMISES_RANGE)
+        # MODIFIED: Pass the chosen connectives to the generator
+        # Formulas stay tuple ASTs through the checks and are only rendered once found
+        # Distinct premises as ast -> truth mask (or None)
+        generated = draw_distinct(partial(generate_candidate_formula, connectives), num_premises)
+        if len(generated) < num_premises:
+            continue
+        premises = list(generated)
+        conclusion, conclusion_mask = generate_candidate_formula(connectives)
 
-    op_type = random.choice(available_op_types)
+        # The filtering logic remains the same
+        if conclusion in generated: continue
+        if USE_TRUTH_TABLES:
+            if not masks_candidate(list(generated.values()), conclusion_mask): continue
+        else:
+            # Entailment, consistency and necessity share one encoding and solver
+            try:
+                if not check_candidate(premises, conclusion): continue
+            except (ValueError, IndexError):
+                continue
 
-    if op_type == 'unary':
-        op = random.choice(connectives['unary'])
-        sub_formula = generate_formula(depth - 1, connectives)
-        return f"({op}{sub_formula})"
-    else:  # binary
-        op = random.choice(connectives['binary'])
-        left = generate_formula(depth - 1, connectives)
-        right = generate_formula(depth - 1, connectives)
-        return f"({left} {op} {right})"
+        found.append(([ast_to_str(p) for p in premises], ast_to_str(conclusion), attempts))
+        attempts = 0
+    return found
 
 
-def formula_to_clauses(formula_str, cnf_writer, top_var_ref):
-    """
-    Parses a formula string and adds its CNF representation to a WCNF object.
-    Updated: robustly handles multi-character operators using regex.
-    """
-    formula_str = formula_str.strip()
-    if formula_str in ATOM_MAP:
-        return ATOM_MAP[formula_str]
-    if formula_str.startswith('(') and formula_str.endswith(')'):
-        content = formula_str[1:-1].strip()
-        if content.startswith('~'):
-            sub_formula = content[1:]
-            sub_literal = formula_to_clauses(sub_formula, cnf_writer, top_var_ref)
-            return -sub_literal
-        # Main operator outside parentheses (now using regex)
-        match = re.search(r'^(.*)\s(<->|->|&|\|)\s(.*)$', content)
-        if match:
-            left_str, op_str, right_str = match.groups()
-            left_str = left_str.strip()
-            right_str = right_str.strip()
-            a = formula_to_clauses(left_str, cnf_writer, top_var_ref)
-            b = formula_to_clauses(right_str, cnf_writer, top_var_ref)
-            top_var_ref[0] += 1
-            v = top_var_ref[0]
-            if op_str == '&': cnf_writer.extend([[-v, a], [-v, b], [-a, -b, v]])
-            elif op_str == '|': cnf_writer.extend([[-v, a, b], [-a, v], [-b, v]])
-            elif op_str == '->': cnf_writer.extend([[-v, -a, b], [a, v], [-b, v]])
-            elif op_str == '<->': cnf_writer.extend([[-v, -a, b], [-v, -b, a], [a, b, v], [-a, -b, v]])
-            return v
-    raise ValueError(f"Could not parse formula: {formula_str}")
-def check_entailment(premises, conclusion):
-    """Checks if premises entail the conclusion using a SAT solver."""
-    wcnf = WCNF()
-    top_var_list = [len(ATOM_MAP)]
-    for p in premises:
-        p_lit = formula_to_clauses(p, wcnf, top_var_list)
-        wcnf.append([p_lit])
-    c_lit = formula_to_clauses(conclusion, wcnf, top_var_list)
-    wcnf.append([-c_lit])
-    with Glucose3(bootstrap_with=wcnf.hard) as g:
-        return not g.solve()
-
-
-def check_contradiction(premises):
-    """Checks if a set of premises is self-contradictory."""
-    wcnf = WCNF()
-    top_var_list = [len(ATOM_MAP)]
-    for p in premises:
-        p_lit = formula_to_clauses(p, wcnf, top_var_list)
-        wcnf.append([p_lit])
-    with Glucose3(bootstrap_with=wcnf.hard) as g:
-        return not g.solve()
+def seed_worker():
+    """Reseed each worker so forked processes don't share a random sequence."""
+    random.seed(os.getpid() ^ time.time_ns())
 
 
 def main():
@@ -137,44 +115,32 @@ def main():
     # --- Main Loop (now uses the selected connectives) ---
     print(f"Searching for {TARGET_ENTAILMENTS} valid, non-trivial entailments...")
     found_entailments = []
-    attempts = 0
-    while len(found_entailments) < TARGET_ENTAILMENTS:
-        attempts += 1
-        num_premises = random.choice(NUM_PREMISES_RANGE)
-        # MODIFIED: Pass the chosen connectives to the generator
-        premises = list(set(generate_formula(MAX_DEPTH, selected_connectives) for _ in range(num_premises)))
-        if len(premises) < num_premises:
-            continue
-        conclusion = generate_formula(MAX_DEPTH, selected_connectives)
-
-        # The filtering logic remains the same
-        if conclusion in premises: continue
-        try:
-            if not check_entailment(premises, conclusion): continue
-            if check_contradiction(premises): continue
-            is_necessary = True
-            if len(premises) > 1:
-                for i in range(len(premises)):
-                    subset_premises = premises[:i] + premises[i+1:]
-                    if check_entailment(subset_premises, conclusion):
-                        is_necessary = False; break
-            if not is_necessary: continue
-        except (ValueError, IndexError):
-            continue
-
-         # STANDARDIZE SYMBOLS: Convert to student-friendly format after SAT validation
-        standardized_premises = [standardize_symbols(p) for p in premises]
-        standardized_conclusion = standardize_symbols(conclusion)
-        
-        found_entailments.append((standardized_premises, standardized_conclusion))
-        print(f"\n--- Found Entailment #{len(found_entailments)} (on attempt {attempts}) ---")
-        print("Premises:")
-        for i, p in enumerate(standardized_premises):
-            print(f"  {i+1}: {p}")
-        print("Conclusion:")
-        print(f"  |= {standardized_conclusion}")
-        attempts = 0# Fix Windows terminal encoding
-
+    seen = set()
+    search = partial(find_entailments, selected_connectives)
+    with multiprocessing.Pool(NUM_WORKERS, initializer=seed_worker) as pool:
+        while len(found_entailments) < TARGET_ENTAILMENTS:
+            # One round hands every worker its own batch of attempts
+            for batch in pool.imap_unordered(search, [ATTEMPTS_PER_TASK] * NUM_WORKERS):
+                for premises, conclusion, attempts in batch:
+                    if len(found_entailments) >= TARGET_ENTAILMENTS:
+                        break
+                    # Workers search independently, so drop repeats here
+                    key = (frozenset(premises), conclusion)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                    # STANDARDIZE SYMBOLS: Convert to student-friendly format after SAT validation
+                    standardized_premises = [standardize_symbols(p) for p in premises]
+                    standardized_conclusion = standardize_symbols(conclusion)
+
+                    found_entailments.append((standardized_premises, standardized_conclusion))
+                    print(f"\n--- Found Entailment #{len(found_entailments)} (on attempt {attempts}) ---")
+                    print("Premises:")
+                    for i, p in enumerate(standardized_premises):
+                        print(f"  {i+1}: {p}")
+                    print("Conclusion:")
+                    print(f"  |= {standardized_conclusion}")
 
 
 if __name__ == "__main__":
@@ -32,39 +32,40 @@ def analyze_results(csv_file: str):
     print("SUCCESS RATES BY CONDITION")
     print("="*60)
     
-    by_condition = df.groupby('condition').agg({
-        'solved': ['sum', 'count', 'mean'],
-        'time_seconds': 'mean',
-        'conversation_turns': 'mean'
-    }).round(2)
-    
-    for condition in df['condition'].unique():
-        condition_data = df[df['condition'] == condition]
-        solved = condition_data['solved'].sum()
-        total = len(condition_data)
-        success_rate = (solved / total) * 100
-        avg_time = condition_data['time_seconds'].mean()
-        avg_turns = condition_data['conversation_turns'].mean()
+    # One grouped pass; reindexed so conditions print in order of first appearance
+    by_condition = df.groupby('condition').agg(
+        solved_sum=('solved', 'sum'),
+        total=('solved', 'size'),
+        time_mean=('time_seconds', 'mean'),
+        turns_mean=('conversation_turns', 'mean'),
+    ).loc[df['condition'].unique()]
+    
+    for stats in by_condition.itertuples():
+        success_rate = (stats.solved_sum / stats.total) * 100
         
-        print(f"\n{condition.upper()}:")
-        print(f"  Success: {solved}/{total} ({success_rate:.1f}%)")
-        print(f"  Avg time: {avg_time:.2f}s")
-        print(f"  Avg turns: {avg_turns:.1f}")
+        print(f"\n{stats.Index.upper()}:")
+        print(f"  Success: {stats.solved_sum}/{stats.total} ({success_rate:.1f}%)")
+        print(f"  Avg time: {stats.time_mean:.2f}s")
+        print(f"  Avg turns: {stats.turns_mean:.1f}")
     
     # Problem-by-problem breakdown
     print("\n" + "="*60)
     print("PROBLEM-BY-PROBLEM BREAKDOWN")
     print("="*60)
     
+    # First run of each (problem, condition) pair, looked up instead of re-filtering df
+    first_runs = df.drop_duplicates(['problem_id', 'condition'])
+    first_run = dict(zip(zip(first_runs['problem_id'], first_runs['condition']),
+                         zip(first_runs['solved'], first_runs['time_seconds'])))
+    
     for problem_id in sorted(df['problem_id'].unique()):
-        problem_data = df[df['problem_id'] == problem_id]
         print(f"\n{problem_id}:")
         
         for condition in ['baseline', 'multi_shot', 'protocol']:
-            row = problem_data[problem_data['condition'] == condition]
-            if len(row) > 0:
-                solved = "✓" if row['solved'].iloc[0] else "✗"
-                time = row['time_seconds'].iloc[0]
+            run = first_run.get((problem_id, condition))
+            if run is not None:
+                solved = "✓" if run[0] else "✗"
+                time = run[1]
                 print(f"  {condition:12s}: {solved} ({time:.2f}s)")
     
     # Failures analysis
@@ -9,6 +9,7 @@ Uses existing components: problem generator → proof solver → validator → b
 import json
 import csv
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -17,7 +18,7 @@ from typing import List, Dict, Any, Optional
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.proof_solver import solve_proof
-from src.ascii_to_json import convert_ascii_to_json
+from src.ascii_to_json import SKIP_RULES, convert_ascii_to_json
 from src.proof_checker import check_proof
 
 class ProblemBankBuilder:
@@ -48,8 +49,8 @@ class ProblemBankBuilder:
         for step in json_proof.get('solution', []):
             justification = step['justification']
             # Extract rule name (part before space or number)
-            rule_match = justification.split()[0] if justification else ''
-            if rule_match and rule_match not in ['Pr', 'Hyp', 'R']:
+            rule_match = justification.split(maxsplit=1)[0] if justification else ''
+            if rule_match and rule_match not in SKIP_RULES:
                 rules_used.add(rule_match)
         
         return {
@@ -104,34 +105,41 @@ class ProblemBankBuilder:
     
     def save_to_bank(self, bank_entry: Dict[str, Any]):
         """Append successful problem to JSONL bank file."""
+        line = json.dumps(bank_entry, ensure_ascii=False) + '\n'
         with open(self.output_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(bank_entry, ensure_ascii=False) + '\n')
+            f.write(line)
     
-    def build_from_existing_problems(self, problems_file: str, max_problems: int = None, model: str = "deepseek/deepseek-chat"):
-        """Build problem bank from existing problem set."""
+    def build_from_existing_problems(self, problems_file: str, max_problems: int = None, model: str = "deepseek/deepseek-chat",
+                                     max_workers: int = 10):
+        """Build problem bank from existing problem set.
+        
+        Each LLM call is network-bound, so up to max_workers problems are tested at once.
+        """
         print(f"📚 Building problem bank from {problems_file}")
         
         problems = self.load_existing_problems(problems_file)
         if max_problems:
             problems = problems[:max_problems]
         
-        print(f"Testing {len(problems)} problems...\n")
+        print(f"Testing {len(problems)} problems with {max_workers} workers...\n")
         
         successful_entries = []
         
-        for i, problem in enumerate(problems, 1):
-            print(f"[{i}/{len(problems)}] ", end="")
-            
-            bank_entry = self.test_problem_with_llm(problem, model)
-            
-            if bank_entry:
-                self.save_to_bank(bank_entry)
-                successful_entries.append(bank_entry)
-                self.stats['successful_proofs'] += 1
-            else:
-                self.stats['failed_proofs'] += 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.test_problem_with_llm, problem, model) for problem in problems]
             
-            self.stats['total_generated'] += 1
+            for i, future in enumerate(as_completed(futures), 1):
+                bank_entry = future.result()
+                print(f"[{i}/{len(problems)}] done")
+                
+                if bank_entry:
+                    self.save_to_bank(bank_entry)
+                    successful_entries.append(bank_entry)
+                    self.stats['successful_proofs'] += 1
+                else:
+                    self.stats['failed_proofs'] += 1
+                
+                self.stats['total_generated'] += 1
         
         # Print summary
         print(f"\n{'='*60}")
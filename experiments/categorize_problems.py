@@ -18,52 +18,63 @@ Allowed: Type 3 + IP, ⊥E (EFQ)
 New-rule condition: uses ≥1 of {IP, ⊥E} (rules not in Type 3)
 """
 
-import json
 import sys
+from functools import reduce
+from operator import or_
 from pathlib import Path
 
 
-
 # Add parent directory to path to import src modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # ... existing TYPE_RULES and NEW_RULES definitions ...
 
+from src.fastjson import loads as json_loads
 from src.symbol_standardizer import standardize_symbols
 
 
 # Define rule sets for each type
 TYPE_RULES = {
-    1: {"∧I", "∧E", "→I", "→E"},
-    2: {"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E"},
-    3: {"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E", "¬I", "¬E"},
-    4: {"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E", "¬I", "¬E", "IP", "⊥E"}
+    1: frozenset({"∧I", "∧E", "→I", "→E"}),
+    2: frozenset({"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E"}),
+    3: frozenset({"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E", "¬I", "¬E"}),
+    4: frozenset({"∧I", "∧E", "→I", "→E", "∨I", "∨E", "↔I", "↔E", "¬I", "¬E", "IP", "⊥E"})
 }
 
 # New rules for each type (rules that weren't in previous type)
 NEW_RULES = {
-    2: {"∨I", "∨E", "↔I", "↔E"},
-    3: {"¬I", "¬E"},
-    4: {"IP", "⊥E"}
+    2: frozenset({"∨I", "∨E", "↔I", "↔E"}),
+    3: frozenset({"¬I", "¬E"}),
+    4: frozenset({"IP", "⊥E"})
 }
 
+# One bit per rule so each type test is two integer operations
+RULE_BITS = {rule: 1 << i for i, rule in enumerate(sorted(TYPE_RULES[4]))}
+# Rules outside every type never fit
+UNKNOWN_RULE_BIT = 1 << len(RULE_BITS)
+
+
+def rule_mask(rules) -> int:
+    """Encode a collection of rule names as a bitmask."""
+    return reduce(or_, (RULE_BITS.get(rule, UNKNOWN_RULE_BIT) for rule in rules), 0)
+
+
+ALLOWED_MASKS = {type_num: rule_mask(rules) for type_num, rules in TYPE_RULES.items()}
+NEW_RULE_MASKS = {type_num: rule_mask(rules) for type_num, rules in NEW_RULES.items()}
+
 def categorize_problem(rules_used):
     """Categorize a problem based on rules used"""
-    rules_set = set(rules_used)
+    used = rule_mask(rules_used)
     
     # Check if problem fits in each type
     for type_num in [4, 3, 2, 1]:
-        allowed_rules = TYPE_RULES[type_num]
-        
         # Must only use allowed rules for this type
-        if not rules_set.issubset(allowed_rules):
+        if used & ~ALLOWED_MASKS[type_num]:
             continue
             
         # For types 2+, must use at least one new rule
-        if type_num > 1:
-            new_rules = NEW_RULES[type_num]
-            if not any(rule in new_rules for rule in rules_set):
-                continue
+        if type_num > 1 and not used & NEW_RULE_MASKS[type_num]:
+            continue
                 
         return type_num
     
@@ -72,12 +83,8 @@ def categorize_problem(rules_used):
 
 def load_problems(bank_file):
     """Load problems from JSONL file"""
-    problems = []
-    with open(bank_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                problems.append(json.loads(line))
-    return problems
+    with open(bank_file, 'rb') as f:
+        return [json_loads(line) for line in f if line.strip()]
 
 
 
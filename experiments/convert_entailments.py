@@ -9,6 +9,15 @@ import re
 from pathlib import Path
 
 
+HEADER = re.compile(r'--- Found Entailment #(\d+)')
+PREMISE = re.compile(r'\d+:\s*(.+)')
+ENTAILS = re.compile(r'\|=\s*(.+)')
+TURNSTILE = re.compile(r'⊢\s*(.+)')
+
+# Line-scanner states
+SEEK_HEADER, READ_HEADER, READ_PREMISES, READ_CONCLUSION = range(4)
+
+
 def parse_entailment_output(text: str) -> list:
     """
     Parse entailment_finder console output into problem list.
@@ -20,36 +29,19 @@ def parse_entailment_output(text: str) -> list:
       2: Q
     Conclusion:
       |= R
+    
+    The text is scanned once, line by line, with a small state machine.
     """
     problems = []
-    
-    # Split by entailment blocks
-    blocks = re.split(r'--- Found Entailment #(\d+)', text)
-    
-    for i in range(1, len(blocks), 2):
-        entailment_num = blocks[i]
-        content = blocks[i + 1]
-        
-        # Extract premises
-        premises = []
-        premise_section = re.search(r'Premises:(.*?)Conclusion:', content, re.DOTALL)
-        if premise_section:
-            premise_lines = premise_section.group(1).strip().split('\n')
-            for line in premise_lines:
-                # Match format: "  1: (formula)"
-                match = re.search(r'\d+:\s*(.+)', line.strip())
-                if match:
-                    premises.append(match.group(1).strip())
-        
-        # Extract conclusion - look for |= or ⊢
-        conclusion = None
-        conclusion_match = re.search(r'\|=\s*(.+)', content)
-        if not conclusion_match:
-            conclusion_match = re.search(r'⊢\s*(.+)', content)
-        if conclusion_match:
-            conclusion = conclusion_match.group(1).strip()
-        
-        if premises and conclusion:
+    state = SEEK_HEADER
+    entailment_num = None
+    premises = []
+    # A '|=' conclusion anywhere in the block wins over a '⊢' one
+    entails = turnstile = None
+
+    def flush():
+        conclusion = entails or turnstile
+        if state == READ_CONCLUSION and premises and conclusion:
             problems.append({
                 'id': f'entailment_{entailment_num.zfill(3)}',
                 'premises': premises,
@@ -59,6 +51,39 @@ def parse_entailment_output(text: str) -> list:
                     'length': len(premises) + 1
                 }
             })
+
+    for line in text.splitlines():
+        header = HEADER.search(line)
+        if header:
+            flush()
+            state = READ_HEADER
+            entailment_num = header.group(1)
+            premises = []
+            entails = turnstile = None
+            continue
+        if state == SEEK_HEADER:
+            continue
+
+        if state == READ_HEADER and 'Premises:' in line:
+            state = READ_PREMISES
+        elif state == READ_PREMISES and 'Conclusion:' in line:
+            state = READ_CONCLUSION
+        elif state == READ_PREMISES:
+            # Match format: "  1: (formula)"
+            match = PREMISE.search(line.strip())
+            if match:
+                premises.append(match.group(1).strip())
+
+        # Extract conclusion - look for |= or ⊢
+        if entails is None:
+            match = ENTAILS.search(line)
+            if match:
+                entails = match.group(1).strip()
+        if turnstile is None:
+            match = TURNSTILE.search(line)
+            if match:
+                turnstile = match.group(1).strip()
+    flush()
     
     return problems
 
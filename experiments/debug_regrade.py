@@ -1,7 +1,9 @@
+import argparse
+import io
 import sys
-import json
+import re
 import subprocess
-import tempfile
+from contextlib import redirect_stdout
 from pathlib import Path
 from typing import List, Optional
 
@@ -10,70 +12,124 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Now import from src
 from src.ascii_to_json import convert_ascii_to_json
+from src.experiment_data import extract_ascii_proof_from_conversation, load_problem_lookup
+from src.fastjson import dumps as json_dumps, loads as json_loads
 from src.proof_checker import check_proof
 
 
-def debug_single_proof(problem_id: str, premises: List[str], conclusion: str, ascii_proof: str):
-    """Debug a single proof to see exactly what's happening in validation."""
+PHP_CHECKER = Path("test_checker.php")
+
+def start_batch_checker() -> subprocess.Popen:
+    """Start one long-running PHP checker that validates a JSON proof per stdin line."""
+    return subprocess.Popen(
+        ['php', str(PHP_CHECKER), '--batch'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+
+def open_batch_checker() -> Optional[subprocess.Popen]:
+    """start_batch_checker, or None (with a warning) if PHP cannot be started."""
+    try:
+        return start_batch_checker()
+    except OSError as e:
+        print(f"⚠️  Could not start the batch checker ({e}); checking each proof separately")
+        return None
+
+def close_batch_checker(checker: subprocess.Popen):
+    """Close the checker's pipes and wait for it to exit; it may already be dead."""
+    try:
+        checker.stdin.close()
+    except BrokenPipeError:
+        pass
+    checker.stdout.close()
+    checker.wait()
+
+def batch_check(checker: subprocess.Popen, json_proof: dict) -> Optional[dict]:
+    """
+    The batch checker's verdict on json_proof, or None if the checker has
+    died (before or while checking it). A dead checker is killed outright,
+    so checker.poll() tells the caller to start a new one.
+    """
+    if checker.poll() is None:
+        try:
+            # Proofs go over the pipe as UTF-8 JSON bytes, one per line
+            checker.stdin.write(json_dumps(json_proof) + b'\n')
+            checker.stdin.flush()
+            line = checker.stdout.readline()
+        except OSError:
+            line = b''
+        if line:
+            return json_loads(line)
+    checker.kill()
+    checker.wait()
+    return None
+
+def into_report(report: List[str], func, *args):
+    """
+    Call func, adding anything it prints to report, so the output of the
+    converter and checker stays with the proof it belongs to.
+    """
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            return func(*args)
+    finally:
+        if output.getvalue():
+            report.append(output.getvalue().rstrip('\n'))
+
+def debug_single_proof(problem_id: str, premises: List[str], conclusion: str, ascii_proof: str,
+                       checker: Optional[subprocess.Popen] = None):
+    """
+    Debug a single proof to see exactly what's happening in validation.
+    If checker (from start_batch_checker) is given, the proof is sent to it;
+    otherwise src.proof_checker.check_proof starts a PHP process for it.
+    """
     
-    print(f"\n🔍 DEBUGGING {problem_id}")
-    print("ASCII Proof:")
-    print(ascii_proof)
-    print("\n" + "="*50)
+    # The report is collected and written in one go rather than print by print
+    report = [f"\n🔍 DEBUGGING {problem_id}", "ASCII Proof:", ascii_proof, "\n" + "="*50]
     
     try:
         # Step 1: ASCII to JSON conversion
-        json_proof = convert_ascii_to_json(ascii_proof, premises, conclusion)
-        print("✅ ASCII→JSON conversion succeeded")
-        print(f"JSON structure: {len(json_proof.get('solution', []))} steps")
-        
-        # Step 2: Save to temp file and call PHP checker directly
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
-            json.dump(json_proof, f, ensure_ascii=False)
-            temp_path = f.name
-        
-        # Step 3: Call PHP checker directly
-        php_script = Path("test_checker.php")
-        result = subprocess.run(
-            ['php', str(php_script), temp_path],
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-        
-        print(f"PHP Checker Output:")
-        print("STDOUT:", result.stdout)
-        print("STDERR:", result.stderr)
-        print("Return code:", result.returncode)
+        json_proof = into_report(report, convert_ascii_to_json, ascii_proof, premises, conclusion)
+        report.append("✅ ASCII→JSON conversion succeeded")
+        report.append(f"JSON structure: {len(json_proof.get('solution', []))} steps")
         
-        # Clean up
-        Path(temp_path).unlink(missing_ok=True)
+        # Step 2: Validate, through the batch checker if one is running
+        verdict = batch_check(checker, json_proof) if checker is not None else None
+        if verdict is None:
+            if checker is not None:
+                report.append("⚠️  Batch checker died; checking this proof on its own")
+            verdict = into_report(report, check_proof, json_proof)
+        report.append("Checker verdict: valid={valid}, concReached={concReached}".format(**verdict))
         
-        # Step 4: Analyze the output
-        if "✓ VALID" in result.stdout:
-            print("🎉 PROOF IS ACTUALLY VALID!")
+        # Step 3: Analyze the verdict
+        if verdict['valid']:
+            report.append("🎉 PROOF IS ACTUALLY VALID!")
             return True
-        elif "INVALID" in result.stdout:
-            print("❌ PROOF IS INVALID")
-            # Extract the specific issues
-            if "Issues found:" in result.stdout:
-                issues_start = result.stdout.find("Issues found:")
-                print("Validation issues:", result.stdout[issues_start:])
-            return False
-        else:
-            print("⚠️  UNKNOWN CHECKER RESPONSE")
-            return False
+        report.append("❌ PROOF IS INVALID")
+        if verdict['issues']:
+            report.append(f"Validation issues: {verdict['issues']}")
+        return False
             
     except Exception as e:
-        print(f"💥 DEBUGGING FAILED: {e}")
+        report.append(f"💥 DEBUGGING FAILED: {e}")
         return False
+    
+    finally:
+        sys.stdout.write('\n'.join(report) + '\n')
 
-def debug_failed_proofs(experiment_dir: str, problems_file: str):
-    """Debug all failed proofs to understand the validation issues."""
+# Conversation file stem: "entailment_001_protocol_conv" -> ("entailment_001", "protocol").
+# Conditions are spelled out because multi_shot itself contains an underscore.
+CONVERSATION_STEM = re.compile(r'^(.*)_(baseline|multi_shot|protocol)_conv$')
+
+def debug_failed_proofs(experiment_dir: str, problems_file: str, batch: bool = True):
+    """
+    Debug all failed proofs to understand the validation issues.
+    With batch=False every proof gets its own PHP process instead of sharing
+    one batch checker.
+    """
     
-    with open(problems_file, 'r', encoding='utf-8') as f:
-        problems = json.load(f)
-    problem_lookup = {p['id']: p for p in problems}
+    problem_lookup = load_problem_lookup(problems_file)
     
     # Get list of conversation files for failed proofs
     conversations_dir = Path(experiment_dir) / "conversations"
@@ -81,12 +137,13 @@ def debug_failed_proofs(experiment_dir: str, problems_file: str):
     
     for conv_file in conversations_dir.glob("*_conv.txt"):
         # Extract problem_id and condition from filename
-        parts = conv_file.stem.split('_')
-        problem_id = '_'.join(parts[:-2])  # Handle IDs like "entailment_001"
-        condition = parts[-2]
+        name_match = CONVERSATION_STEM.match(conv_file.stem)
+        if not name_match:
+            continue
+        problem_id, condition = name_match.groups()
         
         # Read the proof from conversation
-        ascii_proof = extract_ascii_proof_from_conversation(str(conv_file))
+        ascii_proof = extract_ascii_proof_from_conversation(conv_file)
         if ascii_proof:
             problem = problem_lookup.get(problem_id)
             if problem:
@@ -102,47 +159,36 @@ def debug_failed_proofs(experiment_dir: str, problems_file: str):
     print(f"Found {len(failed_conversations)} failed proofs to debug")
     
     valid_count = 0
-    for proof_data in failed_conversations[:10]:  # Debug first 10
-        is_valid = debug_single_proof(
-            problem_id=proof_data['problem_id'],
-            premises=proof_data['premises'],
-            conclusion=proof_data['conclusion'],
-            ascii_proof=proof_data['ascii_proof']
-        )
-        if is_valid:
-            valid_count += 1
+    # One PHP process checks the whole batch instead of one process per proof;
+    # if it cannot be started, each proof is checked (and can fail) on its own
+    checker = open_batch_checker() if batch else None
+    try:
+        for proof_data in failed_conversations[:10]:  # Debug first 10
+            if checker is not None and checker.poll() is not None:
+                # It died on the previous proof, which was checked on its own; start afresh
+                close_batch_checker(checker)
+                checker = open_batch_checker()
+            is_valid = debug_single_proof(
+                problem_id=proof_data['problem_id'],
+                premises=proof_data['premises'],
+                conclusion=proof_data['conclusion'],
+                ascii_proof=proof_data['ascii_proof'],
+                checker=checker
+            )
+            if is_valid:
+                valid_count += 1
+    finally:
+        if checker is not None:
+            close_batch_checker(checker)
     
     print(f"\n📊 DEBUG SUMMARY: {valid_count}/{len(failed_conversations[:10])} proofs are actually valid")
 
-def extract_ascii_proof_from_conversation(conversation_file: str) -> Optional[str]:
-    """Extract the final ASCII proof from a conversation file."""
-    try:
-        with open(conversation_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Look for the final proof (last code block)
-        code_blocks = []
-        in_code_block = False
-        current_block = []
-        
-        for line in content.split('\n'):
-            if line.strip().startswith('```') and not in_code_block:
-                in_code_block = True
-                current_block = []
-            elif line.strip().startswith('```') and in_code_block:
-                in_code_block = False
-                code_blocks.append('\n'.join(current_block))
-            elif in_code_block:
-                current_block.append(line)
-        
-        if code_blocks:
-            return code_blocks[-1]
-        return None
-    except Exception as e:
-        print(f"Error reading {conversation_file}: {e}")
-        return None
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-check failed proofs and show the checker's verdicts")
+    parser.add_argument('--compat', action='store_true',
+                        help="start a PHP process per proof instead of one batch checker")
+    args = parser.parse_args()
+    
     experiment_dir = "data/results/medium_50_2025-10-23_191912"
     problems_file = "data/problems/50_medium_problems.json"
-    debug_failed_proofs(experiment_dir, problems_file)
\ No newline at end of file
+    debug_failed_proofs(experiment_dir, problems_file, batch=not args.compat)
\ No newline at end of file
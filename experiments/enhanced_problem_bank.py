@@ -6,19 +6,35 @@ Automatically generates problems, tests them with LLM, and adds validated proofs
 Categorizes problems by rule sets for easy quiz creation.
 """
 
-import json
 import random
 import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 from datetime import datetime
+from functools import reduce
+from operator import or_
 from typing import List, Dict, Any, Optional, Set
 import itertools
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.fastjson import dumps as json_dumps, loads as json_loads
+from src.ascii_to_json import SKIP_RULES
 from src.proof_solver import solve_proof
-from entailment_finder import generate_formula, check_entailment, check_contradiction
+from entailment_finder import generate_formula, generate_distinct_formulas, check_candidate
+
+@dataclass(slots=True)
+class BankStats:
+    """Counters for the current session."""
+    total_generated: int = 0
+    successful_proofs: int = 0
+    failed_proofs: int = 0
+    by_quiz_type: Dict[str, int] = field(default_factory=dict)
 
 class EnhancedProblemBank:
     def __init__(self, bank_file: str = "data/problems/enhanced_problem_bank.jsonl"):
@@ -34,26 +50,38 @@ class EnhancedProblemBank:
             'quiz_5': {'&E', '&I', '→E', '→I', '↔E', '↔I', '∨E', '∨I', '¬E', '¬I'},  # Add ¬ rules
             'quiz_6': {'&E', '&I', '→E', '→I', '↔E', '↔I', '∨E', '∨I', '¬E', '¬I', '⊥E', 'IP'}  # Everything
         }
+        # One bit per rule so each quiz-type subset test is a single AND;
+        # rules outside every quiz type get a bit no type allows
+        all_rules = set().union(*self.quiz_types.values())
+        self._rule_bits = {rule: 1 << i for i, rule in enumerate(sorted(all_rules))}
+        self._unknown_rule_bit = 1 << len(self._rule_bits)
+        self._quiz_masks = {quiz_type: self._rule_mask(rules) for quiz_type, rules in self.quiz_types.items()}
         
-        self.stats = {
-            'total_generated': 0,
-            'successful_proofs': 0,
-            'failed_proofs': 0,
-            'by_quiz_type': {quiz_type: 0 for quiz_type in self.quiz_types}
-        }
+        self.stats = BankStats(by_quiz_type={quiz_type: 0 for quiz_type in self.quiz_types})
+        # Guards bank appends and stats when problems are tested from several threads
+        self._lock = threading.Lock()
+        # Bank file held open by _open_bank for the length of a batch
+        self._bank_fp = None
+    
+    def _rule_mask(self, rules) -> int:
+        """Encode a collection of rule names as a bitmask."""
+        return reduce(or_, (self._rule_bits.get(rule, self._unknown_rule_bit) for rule in rules), 0)
     
     def load_bank(self) -> List[Dict[str, Any]]:
         """Load existing problems from bank."""
-        problems = []
-        if self.bank_file.exists():
-            with open(self.bank_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        problems.append(json.loads(line))
-        return problems
+        if not self.bank_file.exists():
+            return []
+        # One bulk read; lines are parsed straight from bytes
+        data = self.bank_file.read_bytes()
+        return [json_loads(line) for line in data.splitlines() if line.strip()]
     
-    def generate_new_problem(self, max_depth: int = 2, num_premises_range: tuple = (2, 3)) -> Optional[Dict[str, Any]]:
-        """Generate a new valid entailment problem."""
+    def generate_new_problem(self, max_depth: int = 2, num_premises_range: tuple = (2, 3),
+                             generated_at: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Generate a new valid entailment problem.
+        
+        generated_at lets a batch stamp all its problems with one timestamp;
+        by default the current time is used.
+        """
         attempts = 0
         max_attempts = 100
         
@@ -62,9 +90,9 @@ class EnhancedProblemBank:
             
             # Generate random problem
             num_premises = random.randint(*num_premises_range)
-            premises = list(set(generate_formula(max_depth) for _ in range(num_premises)))
+            premises = generate_distinct_formulas(max_depth, num_premises)
             
-            # Ensure we have the right number of premises (no duplicates)
+            # Repeats are redrawn, but a short list can still come back
             if len(premises) < num_premises:
                 continue
                 
@@ -74,39 +102,24 @@ class EnhancedProblemBank:
             if conclusion in premises:
                 continue
             
-            # Check if valid entailment
+            # Entailment, consistency and necessity in one query (one shared
+            # encoding and solver, or pure truth-mask ops for few atoms)
             try:
-                is_valid = check_entailment(premises, conclusion)
+                is_candidate = check_candidate(premises, conclusion)
             except (ValueError, IndexError):
                 continue
             
-            if is_valid:
-                # Filter: premises shouldn't be contradictory
-                if check_contradiction(premises):
-                    continue
-                
-                # Filter: check if all premises are necessary
-                is_necessary = True
-                if len(premises) > 1:
-                    for i in range(len(premises)):
-                        subset_premises = premises[:i] + premises[i+1:]
-                        if check_entailment(subset_premises, conclusion):
-                            is_necessary = False
-                            break
-                
-                if is_necessary:
-                    problem_id = f"auto_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
-                    
-                    return {
-                        'id': problem_id,
-                        'premises': premises,
-                        'conclusion': conclusion,
-                        'difficulty': {
-                            'depth': max_depth,
-                            'length': len(premises) + 1  # +1 for conclusion
-                        },
-                        'generated_at': datetime.now().isoformat()
-                    }
+            if is_candidate:
+                return {
+                    'id': f"auto_{uuid.uuid4().hex[:12]}",
+                    'premises': premises,
+                    'conclusion': conclusion,
+                    'difficulty': {
+                        'depth': max_depth,
+                        'length': len(premises) + 1  # +1 for conclusion
+                    },
+                    'generated_at': generated_at or datetime.now().isoformat()
+                }
         
         return None
     
@@ -114,25 +127,30 @@ class EnhancedProblemBank:
         """Extract metadata including quiz type categorization."""
         proof_lines = [line for line in ascii_proof.split('\n') if line.strip()]
         
-        # Extract rules used
+        # Extract rules used and the deepest subproof in one pass over the steps
+        solution = json_proof.get('solution', [])
         rules_used = set()
-        for step in json_proof.get('solution', []):
+        subproof_depth = 0
+        for step in solution:
             justification = step['justification']
-            rule_match = justification.split()[0] if justification else ''
-            if rule_match and rule_match not in ['Pr', 'Hyp', 'R']:
+            rule_match = justification.split(maxsplit=1)[0] if justification else ''
+            if rule_match and rule_match not in SKIP_RULES:
                 rules_used.add(rule_match)
+            subproof_depth = max(subproof_depth, step.get('assumeno', 0))
         
-        # Determine which quiz types this problem fits
-        compatible_quiz_types = []
-        for quiz_type, required_rules in self.quiz_types.items():
-            if rules_used.issubset(required_rules):
-                compatible_quiz_types.append(quiz_type)
+        # Determine which quiz types this problem fits (all of them if no rules were used)
+        if rules_used:
+            used_mask = self._rule_mask(rules_used)
+            compatible_quiz_types = [quiz_type for quiz_type, allowed_mask in self._quiz_masks.items()
+                                     if not used_mask & ~allowed_mask]
+        else:
+            compatible_quiz_types = list(self.quiz_types)
         
         return {
             'line_count': len(proof_lines),
             'rules_used': list(rules_used),
-            'subproof_depth': max(step.get('assumeno', 0) for step in json_proof.get('solution', [])),
-            'total_steps': len(json_proof.get('solution', [])),
+            'subproof_depth': subproof_depth,
+            'total_steps': len(solution),
             'compatible_quiz_types': compatible_quiz_types
         }
     
@@ -173,44 +191,73 @@ class EnhancedProblemBank:
                 self.save_to_bank(bank_entry)
                 
                 # Update stats
-                self.stats['successful_proofs'] += 1
-                for quiz_type in metadata['compatible_quiz_types']:
-                    self.stats['by_quiz_type'][quiz_type] += 1
+                with self._lock:
+                    self.stats.successful_proofs += 1
+                    for quiz_type in metadata['compatible_quiz_types']:
+                        self.stats.by_quiz_type[quiz_type] += 1
                 
                 return True
             else:
                 print(f"    ❌ FAILED: {result.get('error', 'Unknown error')}")
-                self.stats['failed_proofs'] += 1
+                with self._lock:
+                    self.stats.failed_proofs += 1
                 return False
                 
         except Exception as e:
             print(f"    💥 EXCEPTION: {e}")
-            self.stats['failed_proofs'] += 1
+            with self._lock:
+                self.stats.failed_proofs += 1
             return False
     
+    @contextmanager
+    def _open_bank(self):
+        """Keep the bank file open (and buffered) so save_to_bank doesn't reopen it per entry."""
+        self._bank_fp = open(self.bank_file, 'ab', buffering=1 << 16)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._bank_fp.close()
+                self._bank_fp = None
+    
     def save_to_bank(self, bank_entry: Dict[str, Any]):
         """Append to growing bank file."""
-        with open(self.bank_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(bank_entry, ensure_ascii=False) + '\n')
+        line = json_dumps(bank_entry) + b'\n'
+        with self._lock:
+            if self._bank_fp is not None:
+                self._bank_fp.write(line)
+                return
+            with open(self.bank_file, 'ab') as f:
+                f.write(line)
     
-    def generate_and_test_batch(self, batch_size: int = 10, model: str = "deepseek/deepseek-chat"):
-        """Generate and test a batch of new problems."""
-        print(f"🎲 Generating {batch_size} new problems...")
+    def generate_and_test_batch(self, batch_size: int = 10, model: str = "deepseek/deepseek-chat",
+                                max_workers: int = 8):
+        """Generate and test a batch of new problems.
         
-        successful = 0
+        Problems are generated up front (cheap, CPU-bound); the LLM tests are
+        network-bound, so up to max_workers of them run at once.
+        """
+        print(f"🎲 Generating {batch_size} new problems...")
         
+        problems = []
+        generated_at = datetime.now().isoformat()
         for i in range(batch_size):
-            print(f"[{i+1}/{batch_size}] ", end="")
-            
-            problem = self.generate_new_problem()
+            problem = self.generate_new_problem(generated_at=generated_at)
             if problem:
-                if self.test_and_save_problem(problem, model):
-                    successful += 1
+                problems.append(problem)
             else:
-                print("    ⚠️  Could not generate valid problem")
-                self.stats['failed_proofs'] += 1
+                print(f"[{i+1}/{batch_size}]     ⚠️  Could not generate valid problem")
+                self.stats.failed_proofs += 1
             
-            self.stats['total_generated'] += 1
+            self.stats.total_generated += 1
+        
+        successful = 0
+        
+        with self._open_bank(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.test_and_save_problem, problem, model) for problem in problems]
+            for future in as_completed(futures):
+                if future.result():
+                    successful += 1
         
         return successful
     
@@ -223,13 +270,13 @@ class EnhancedProblemBank:
         print(f"{'='*60}")
         print(f"Total problems in bank: {len(bank_problems)}")
         print(f"Current session:")
-        print(f"  Generated: {self.stats['total_generated']}")
-        print(f"  Successful: {self.stats['successful_proofs']}")
-        print(f"  Failed: {self.stats['failed_proofs']}")
-        print(f"  Success rate: {self.stats['successful_proofs']/self.stats['total_generated']*100:.1f}%")
+        print(f"  Generated: {self.stats.total_generated}")
+        print(f"  Successful: {self.stats.successful_proofs}")
+        print(f"  Failed: {self.stats.failed_proofs}")
+        print(f"  Success rate: {self.stats.successful_proofs/self.stats.total_generated*100:.1f}%")
         
         print(f"\nProblems by quiz type:")
-        for quiz_type, count in self.stats['by_quiz_type'].items():
+        for quiz_type, count in self.stats.by_quiz_type.items():
             if count > 0:
                 print(f"  {quiz_type}: {count} problems")
 
@@ -2,57 +2,74 @@
 """
 Extract successful protocol solutions from conversation files and validate them.
 """
-import json
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Union
 
-def extract_proof_from_conversation(conv_file: str):
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.fastjson import dumps as json_dumps
+
+# Fenced code block, optionally tagged with a language
+CODE_BLOCK_RE = re.compile(r'```(?:\w+)?\n(.*?)\n```', re.DOTALL)
+# Turn header line written by run_experiment.save_run_conversation ("Turn 3 - assistant")
+TURN_HEADER_RE = re.compile(r'^Turn \d+ - (\w+)\n', re.MULTILINE)
+
+def extract_proof_from_conversation(conv_file: Union[str, Path]):
     """Extract the final proof from a conversation file"""
     with open(conv_file, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Look for the final proof in the last assistant turn
-    turns = content.split('============================================================\n')
-    for turn in reversed(turns):
-        if turn.startswith('Turn') and 'assistant' in turn:
-            # Extract proof between triple backticks
-            proof_match = re.search(r'```(?:\w+)?\n(.*?)\n```', turn, re.DOTALL)
-            if proof_match:
-                return proof_match.group(1).strip()
+    # Look for the final proof, starting from the last assistant turn; each
+    # turn runs from its header to the next one
+    headers = list(TURN_HEADER_RE.finditer(content))
+    for i in reversed(range(len(headers))):
+        if headers[i].group(1) != 'assistant':
+            continue
+        turn_end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        proof_match = CODE_BLOCK_RE.search(content, headers[i].end(), turn_end)
+        if proof_match:
+            return proof_match.group(1).strip()
     return None
 
-def extract_conversation_solutions(experiment_dir: str, output_file: str):
+def process_conversation(conv_file: Path):
+    """Bank entry for one protocol conversation, or None if it has no valid proof"""
+    problem_id = conv_file.name.split('_')[1]  # Extract entailment_001, etc.
+    
+    # Get the original problem from the 50_medium_problems.json
+    original_problem = get_original_problem(problem_id)
+    if not original_problem:
+        return None
+        
+    # Extract proof from conversation
+    ascii_proof = extract_proof_from_conversation(conv_file)
+    if not ascii_proof:
+        return None
+        
+    # Validate the proof
+    validation_result = validate_proof(original_problem, ascii_proof)
+    if not validation_result.get('valid'):
+        return None
+    return create_bank_entry(original_problem, ascii_proof, validation_result)
+
+def extract_conversation_solutions(experiment_dir: str, output_file: str, max_workers: int = 16):
     """Extract and validate solutions from conversation files"""
     conv_dir = Path(experiment_dir) / "conversations"
-    protocol_files = list(conv_dir.glob("*_protocol_conv.txt"))
-    
-    harvested_problems = []
     
-    for conv_file in protocol_files:
-        problem_id = conv_file.name.split('_')[1]  # Extract entailment_001, etc.
-        
-        # Get the original problem from the 50_medium_problems.json
-        original_problem = get_original_problem(problem_id)
-        if not original_problem:
-            continue
-            
-        # Extract proof from conversation
-        ascii_proof = extract_proof_from_conversation(str(conv_file))
-        if not ascii_proof:
-            continue
-            
-        # Validate the proof
-        validation_result = validate_proof(original_problem, ascii_proof)
-        if validation_result.get('valid'):
-            # Create bank entry
-            bank_entry = create_bank_entry(original_problem, ascii_proof, validation_result)
-            harvested_problems.append(bank_entry)
+    # Reading and validating are I/O-bound, so files are handled concurrently;
+    # map keeps the entries in glob order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        entries = executor.map(process_conversation, conv_dir.glob("*_protocol_conv.txt"))
+        harvested_problems = [entry for entry in entries if entry is not None]
     
     # Append to problem bank
     if harvested_problems:
-        with open(output_file, 'a', encoding='utf-8') as f:
+        with open(output_file, 'ab') as f:
             for entry in harvested_problems:
-                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.write(json_dumps(entry) + b'\n')
     
-    return len(harvested_problems)
\ No newline at end of file
+    return len(harvested_problems)
@@ -8,7 +8,8 @@ from datetime import datetime
 # Add parent directory to path to import entailment_finder functions
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from entailment_finder_interactive import generate_formula, check_entailment, check_contradiction
+from src.fastjson import dumps as json_dumps
+from entailment_finder_interactive import generate_formula, generate_distinct_formulas, check_candidate
 
 def generate_problems_with_bundle(bundle_choice="2"):
     """Generate problems by calling the functions directly"""
@@ -35,7 +36,7 @@ def generate_problems_with_bundle(bundle_choice="2"):
     while len(problems) < target_entailments:
         attempts += 1
         num_premises = 2  # Fixed for simplicity
-        premises = list(set(generate_formula(2, selected_connectives) for _ in range(num_premises)))
+        premises = generate_distinct_formulas(2, num_premises, selected_connectives)
         
         if len(premises) < num_premises:
             continue
@@ -47,20 +48,8 @@ def generate_problems_with_bundle(bundle_choice="2"):
             continue
             
         try:
-            if not check_entailment(premises, conclusion): 
-                continue
-            if check_contradiction(premises): 
-                continue
-                
-            # Check if premises are necessary
-            is_necessary = True
-            if len(premises) > 1:
-                for i in range(len(premises)):
-                    subset_premises = premises[:i] + premises[i+1:]
-                    if check_entailment(subset_premises, conclusion):
-                        is_necessary = False
-                        break
-            if not is_necessary:
+            # Entailment, consistency and necessity share one encoding and solver
+            if not check_candidate(premises, conclusion):
                 continue
                 
         except (ValueError, IndexError):
@@ -81,9 +70,7 @@ def generate_problems_with_bundle(bundle_choice="2"):
         print(f"Found problem {len(problems)}/{target_entailments}")
 
     # Save problems
-    import json
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(problems, f, indent=2)
+    output_file.write_bytes(json_dumps(problems, indent=True))
     
     print(f"Generated {len(problems)} problems to {output_file}")
     return output_file
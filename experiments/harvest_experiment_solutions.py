@@ -6,17 +6,34 @@ Quick problem harvesting using baseline condition only
 - Log failures for later analysis
 """
 import sys
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.proof_solver import solve_proof
+from src.fastjson import dumps as json_dumps
+from src.proof_solver import HARVEST_MODEL, solve_proof
+from src.ascii_to_json import SKIP_RULES
 from src.symbol_standardizer import standardize_symbols
+# Generation and the (memoized) entailment checks shared with the entailment finders
+from entailment_finder_interactive import generate_formula, generate_distinct_formulas, check_candidate
 from experiments.generate_and_save_problems import generate_problems_with_bundle
 
+# Candidates drawn per missing problem in each generation round
+CANDIDATES_PER_PROBLEM = 4
+
+def is_candidate(premises, conclusion, num_premises=2):
+    """Every filter a generated (premises, conclusion) pair has to pass."""
+    if len(premises) < num_premises or conclusion in premises:
+        return False
+    try:
+        # Entailment, consistency and necessity share one encoding and solver
+        return check_candidate(premises, conclusion)
+    except (ValueError, IndexError):
+        return False
+
 def generate_problems_batch(num_problems: int, bundle: str = "2"):
     """Generate a batch of problems without saving to file"""
     print(f"🔧 Generating {num_problems} problems with bundle {bundle}...")
@@ -33,53 +50,32 @@ def generate_problems_batch(num_problems: int, bundle: str = "2"):
     problems = []
     attempts = 0
     max_attempts = num_problems * 10  # Prevent infinite loops
+    num_premises = 2  # Fixed for simplicity
     
+    # Each round draws a batch of candidates sized to what is still missing
+    # and filters it in one pass, instead of one draw-and-check per attempt
     while len(problems) < num_problems and attempts < max_attempts:
-        attempts += 1
-        num_premises = 2  # Fixed for simplicity
-        premises = list(set(generate_formula(2, selected_connectives) for _ in range(num_premises)))
+        round_size = min((num_problems - len(problems)) * CANDIDATES_PER_PROBLEM, max_attempts - attempts)
+        attempts += round_size
+        candidates = [(generate_distinct_formulas(2, num_premises, selected_connectives),
+                       generate_formula(2, selected_connectives))
+                      for _ in range(round_size)]
+        accepted = [(premises, conclusion) for premises, conclusion in candidates
+                    if is_candidate(premises, conclusion, num_premises)]
         
-        if len(premises) < num_premises:
-            continue
-            
-        conclusion = generate_formula(2, selected_connectives)
-
-        # Apply filters
-        if conclusion in premises: 
-            continue
-            
-        try:
-            if not check_entailment(premises, conclusion): 
-                continue
-            if check_contradiction(premises): 
-                continue
-                
-            # Check if premises are necessary
-            is_necessary = True
-            if len(premises) > 1:
-                for i in range(len(premises)):
-                    subset_premises = premises[:i] + premises[i+1:]
-                    if check_entailment(subset_premises, conclusion):
-                        is_necessary = False
-                        break
-            if not is_necessary:
-                continue
-                
-        except (ValueError, IndexError):
-            continue
-
-        # Create problem entry with proper structure
-        problem = {
-            'id': f"quick_{len(problems)+1:03d}",
-            'premises': [standardize_symbols(p) for p in premises],  # Standardize symbols
-            'conclusion': standardize_symbols(conclusion),
-            'difficulty': {
-                'depth': 2,
-                'length': 3
+        for premises, conclusion in accepted[:num_problems - len(problems)]:
+            # Create problem entry with proper structure
+            problem = {
+                'id': f"quick_{len(problems)+1:03d}",
+                'premises': [standardize_symbols(p) for p in premises],  # Standardize symbols
+                'conclusion': standardize_symbols(conclusion),
+                'difficulty': {
+                    'depth': 2,
+                    'length': 3
+                }
             }
-        }
-        problems.append(problem)
-        print(f"   Found problem {len(problems)}/{num_problems}")
+            problems.append(problem)
+            print(f"   Found problem {len(problems)}/{num_problems}")
     
     if len(problems) < num_problems:
         print(f"⚠️  Only found {len(problems)} problems after {attempts} attempts")
@@ -95,29 +91,35 @@ def add_to_problem_bank(problems_with_solutions):
     bank_file = Path("data/problems/fitch_problem_bank.jsonl")
     bank_file.parent.mkdir(parents=True, exist_ok=True)
     
-    count = 0
-    with open(bank_file, 'a', encoding='utf-8') as f:
-        for problem in problems_with_solutions:
-            bank_entry = {
-                'id': problem['id'],
-                'premises': problem['premises'],
-                'conclusion': problem['conclusion'],
-                'difficulty': problem.get('difficulty', {'depth': 2, 'length': 3}),
-                'ascii_solution': problem['ascii_solution'],
-                'json_solution': problem['json_solution'],
-                'metadata': {
-                    'line_count': len([line for line in problem['ascii_solution'].split('\n') if line.strip()]),
-                    'rules_used': extract_rules_from_json(problem['json_solution']),
-                    'subproof_depth': 0,  # Will be calculated from json_solution
-                    'total_steps': len(problem['json_solution'].get('solution', []))
-                },
-                'validation_result': problem['validation_result'],
-                'solved_at': datetime.now().isoformat(),
-                'model_used': 'deepseek/deepseek-chat',
-                'condition_used': 'baseline'
-            }
-            f.write(json.dumps(bank_entry, ensure_ascii=False) + '\n')
-            count += 1
+    # One timestamp for the batch; every line is built first and written in one call
+    solved_at = datetime.now().isoformat()
+    lines = []
+    for problem in problems_with_solutions:
+        bank_entry = {
+            'id': problem['id'],
+            'premises': problem['premises'],
+            'conclusion': problem['conclusion'],
+            'difficulty': problem.get('difficulty', {'depth': 2, 'length': 3}),
+            'ascii_solution': problem['ascii_solution'],
+            'json_solution': problem['json_solution'],
+            'metadata': {
+                'line_count': sum(1 for line in problem['ascii_solution'].split('\n') if line.strip()),
+                'rules_used': extract_rules_from_json(problem['json_solution']),
+                'subproof_depth': 0,  # Will be calculated from json_solution
+                'total_steps': len(problem['json_solution'].get('solution', []))
+            },
+            'validation_result': problem['validation_result'],
+            'solved_at': solved_at,
+            'model_used': HARVEST_MODEL,
+            'condition_used': 'baseline'
+        }
+        lines.append(json_dumps(bank_entry))
+    
+    # Never append a bare newline: an empty batch leaves the bank untouched
+    if lines:
+        with open(bank_file, 'ab') as f:
+            f.write(b'\n'.join(lines) + b'\n')
+    count = len(lines)
     
     print(f"✅ Added {count} problems to bank")
     return count
@@ -128,10 +130,10 @@ def extract_rules_from_json(json_proof):
     for step in json_proof.get('solution', []):
         justification = step.get('justification', '')
         if justification:
-            rule_match = justification.split()[0]
-            if rule_match and rule_match not in ['Pr', 'Hyp', 'R']:
+            rule_match = justification.split(maxsplit=1)[0]
+            if rule_match and rule_match not in SKIP_RULES:
                 rules_used.add(rule_match)
-    return list(rules_used)
+    return sorted(rules_used)
 
 def save_failures(failed_problems):
     """Save failed problems for later analysis"""
@@ -143,8 +145,8 @@ def save_failures(failed_problems):
     failures_file = Path(f"data/problems/failures_{timestamp}.json")
     failures_file.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(failures_file, 'w', encoding='utf-8') as f:
-        json.dump(failed_problems, f, indent=2)
+    # Serialized in one call and written as bytes
+    failures_file.write_bytes(json_dumps(failed_problems, indent=True))
     
     print(f"📝 Saved {len(failed_problems)} failures to {failures_file}")
 
@@ -161,21 +163,26 @@ def quick_harvest_workflow(batch_size=10, bundle="2"):
     
     print(f"📋 Generated {len(problems)} problems")
     
-    # 2. Test with baseline only (saves tokens)
-    results = []
-    for i, problem in enumerate(problems, 1):
-        print(f"🧪 Testing problem {i}/{len(problems)}: {problem['id']}")
-        
-        result = solve_proof(
-            premises=problem['premises'],
-            conclusion=problem['conclusion'], 
-            condition='baseline',
-            model='deepseek/deepseek-chat'
-        )
-        results.append((problem, result))
-        
-        status = "✅ SOLVED" if result['solved'] else "❌ FAILED"
-        print(f"   {status} in {result['time_seconds']:.2f}s")
+    # 2. Test with baseline only (saves tokens). The calls are network-bound,
+    # so they run concurrently and report as they finish.
+    print(f"🧪 Testing {len(problems)} problems...")
+    with ThreadPoolExecutor(max_workers=min(len(problems), 8)) as executor:
+        futures = {
+            executor.submit(
+                solve_proof,
+                premises=problem['premises'],
+                conclusion=problem['conclusion'],
+                condition='baseline',
+                model=HARVEST_MODEL
+            ): problem
+            for problem in problems
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            status = "✅ SOLVED" if result['solved'] else "❌ FAILED"
+            print(f"   [{done}/{len(problems)}] {futures[future]['id']}: {status} in {result['time_seconds']:.2f}s")
+    # Back in generation order for the bank and the failure log
+    results = [(problem, future.result()) for future, problem in futures.items()]
     
     # 3. Process results
     successful_problems = []
@@ -6,65 +6,127 @@ Selects problems from the bank based on rule constraints and difficulty.
 No API calls at runtime - works entirely offline.
 """
 
-import json
 import random
+import sys
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Iterator, Set
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.fastjson import loads as json_loads
 
 class ProblemSampler:
     def __init__(self, bank_file: str = "data/problems/fitch_problem_bank.jsonl"):
         self.bank_file = Path(bank_file)
         self.problems = self.load_bank()
+        self._index_rules()
+        self._index_difficulty()
+    
+    def _index_rules(self):
+        """
+        Precompute each problem's rule set (aligned with self.problems) and an
+        inverted index from rule to problem indices, so filter_by_rules only
+        looks at problems that use at least one allowed rule. Problems that use
+        no rules at all fit every rule set and are kept in their own list.
+        """
+        self._problem_rules = []
+        self._by_rule = defaultdict(set)
+        self._rule_free = set()
+        for index, problem in enumerate(self.problems):
+            rules = frozenset(problem.get('metadata', {}).get('rules_used', []))
+            self._problem_rules.append(rules)
+            for rule in rules:
+                self._by_rule[rule].add(index)
+            if not rules:
+                self._rule_free.add(index)
+    
+    def _index_difficulty(self):
+        """
+        Line counts and subproof depths as int arrays aligned with self.problems,
+        so difficulty limits are one vectorized comparison instead of a dict
+        lookup per problem.
+        """
+        metadata = [problem.get('metadata', {}) for problem in self.problems]
+        self._line_counts = np.fromiter((m.get('line_count', 0) for m in metadata),
+                                        dtype=np.int32, count=len(metadata))
+        self._depths = np.fromiter((m.get('subproof_depth', 0) for m in metadata),
+                                   dtype=np.int32, count=len(metadata))
+    
+    def _difficulty_mask(self, max_lines: int = None, max_depth: int = None) -> np.ndarray:
+        """Boolean mask over self.problems of those within the (truthy) limits."""
+        mask = np.ones(len(self.problems), dtype=bool)
+        if max_lines:
+            mask &= self._line_counts <= max_lines
+        if max_depth:
+            mask &= self._depths <= max_depth
+        return mask
     
     def load_bank(self) -> List[Dict[str, Any]]:
         """Load problems from JSONL bank file."""
-        problems = []
-        if self.bank_file.exists():
-            with open(self.bank_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        problems.append(json.loads(line))
-        return problems
+        if not self.bank_file.exists():
+            return []
+        # One bulk read; lines are parsed straight from bytes
+        data = self.bank_file.read_bytes()
+        return [json_loads(line) for line in data.splitlines() if line.strip()]
+    
+    def _iter_candidates(self, allowed_rules: Set[str] = None, max_lines: int = None,
+                         max_depth: int = None) -> Iterator[Dict[str, Any]]:
+        """Yield, in bank order, the problems that meet every given constraint."""
+        fits = self._difficulty_mask(max_lines, max_depth)
+        # An empty rule set is a constraint too: only rule-free problems fit it
+        if allowed_rules is not None:
+            allowed_rules = frozenset(allowed_rules)
+            candidates = self._rule_free.union(*(self._by_rule.get(rule, ()) for rule in allowed_rules))
+            # Sorted so matches keep their bank order
+            indices = (index for index in sorted(candidates)
+                       if fits[index] and self._problem_rules[index] <= allowed_rules)
+        else:
+            indices = np.flatnonzero(fits)
+        
+        for index in indices:
+            yield self.problems[index]
     
     def filter_by_rules(self, allowed_rules: Set[str]) -> List[Dict[str, Any]]:
         """Filter problems to only include specified rules."""
-        filtered = []
-        for problem in self.problems:
-            problem_rules = set(problem.get('metadata', {}).get('rules_used', []))
-            if problem_rules.issubset(allowed_rules):
-                filtered.append(problem)
-        return filtered
+        return list(self._iter_candidates(allowed_rules=allowed_rules))
     
     def filter_by_difficulty(self, max_lines: int = None, max_depth: int = None) -> List[Dict[str, Any]]:
         """Filter problems by difficulty constraints."""
-        filtered = []
-        for problem in self.problems:
-            metadata = problem.get('metadata', {})
-            if max_lines and metadata.get('line_count', 0) > max_lines:
-                continue
-            if max_depth and metadata.get('subproof_depth', 0) > max_depth:
-                continue
-            filtered.append(problem)
-        return filtered
+        return list(self._iter_candidates(max_lines=max_lines, max_depth=max_depth))
     
-    def sample_problems(self, count: int = 5, allowed_rules: Set[str] = None, **difficulty_kwargs) -> List[Dict[str, Any]]:
-        """Sample problems with optional constraints."""
-        candidates = self.problems
+    def sample_problems(self, count: int = 5, allowed_rules: Set[str] = None, seed: int = None,
+                        **difficulty_kwargs) -> List[Dict[str, Any]]:
+        """
+        Sample problems with optional constraints; count=None returns every match.
+        Rule and difficulty filters are applied together in one pass, and the
+        sample is drawn from that stream with a count-sized reservoir, so the
+        matches are never copied into intermediate lists.
+        """
+        candidates = self._iter_candidates(allowed_rules, **difficulty_kwargs)
+        if count is None:
+            return list(candidates)
+        rng = random if seed is None else random.Random(seed)
         
-        # Apply rule filters
-        if allowed_rules:
-            candidates = self.filter_by_rules(allowed_rules)
+        # Reservoir sampling: the i-th match replaces a random slot with probability count/i
+        reservoir = []
+        for seen, problem in enumerate(candidates):
+            if seen < count:
+                reservoir.append(problem)
+            else:
+                slot = rng.randrange(seen + 1)
+                if slot < count:
+                    reservoir[slot] = problem
         
-        # Apply difficulty filters
-        if difficulty_kwargs:
-            candidates = self.filter_by_difficulty(**difficulty_kwargs)
-        
-        # Sample randomly
-        if len(candidates) < count:
-            print(f"Warning: Only {len(candidates)} problems match criteria (requested {count})")
-            return candidates
-        else:
-            return random.sample(candidates, count)
+        if len(reservoir) < count:
+            print(f"Warning: Only {len(reservoir)} problems match criteria (requested {count})")
+            return reservoir
+        # The reservoir is a uniform subset; shuffle it so the order is random too
+        rng.shuffle(reservoir)
+        return reservoir
     
     def print_problem_set(self, problems: List[Dict[str, Any]]):
         """Print a nicely formatted problem set."""
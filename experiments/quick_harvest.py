@@ -6,7 +6,6 @@ Quick problem harvesting using baseline condition only
 - Log failures for later analysis
 """
 import sys
-import json
 from pathlib import Path
 import time 
 from datetime import datetime
@@ -14,10 +13,13 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.proof_solver import solve_proof
+from src.fastjson import dumps as json_dumps
+from src.proof_solver import HARVEST_MODEL, solve_proof
+from src.ascii_to_json import SKIP_RULES
 from src.symbol_standardizer import standardize_symbols
 from experiments.generate_and_save_problems import generate_problems_with_bundle
-from entailment_finder_interactive import generate_formula, check_entailment, check_contradiction
+from entailment_finder_interactive import (generate_formula, check_entailment, check_contradiction,
+                                           check_premises_necessary)
 
 # Replace the current generate_problems_with_bundle function with:
 
@@ -58,15 +60,9 @@ def generate_problems_batch(num_problems: int, bundle: str = "2"):
             if check_contradiction(premises): 
                 continue
                 
-            # Check if premises are necessary
-            is_necessary = True
-            if len(premises) > 1:
-                for i in range(len(premises)):
-                    subset_premises = premises[:i] + premises[i+1:]
-                    if check_entailment(subset_premises, conclusion):
-                        is_necessary = False
-                        break
-            if not is_necessary:
+            # Check if premises are necessary: one cached query drops each premise
+            # in turn, instead of building a sublist per premise and re-checking it
+            if not check_premises_necessary(premises, conclusion):
                 continue
                 
         except (ValueError, IndexError):
@@ -102,29 +98,35 @@ def add_to_problem_bank(problems_with_solutions):
     bank_file = Path("data/problems/fitch_problem_bank.jsonl")
     bank_file.parent.mkdir(parents=True, exist_ok=True)
     
-    count = 0
-    with open(bank_file, 'a', encoding='utf-8') as f:
-        for problem in problems_with_solutions:
-            bank_entry = {
-                'id': problem['id'],
-                'premises': problem['premises'],
-                'conclusion': problem['conclusion'],
-                'difficulty': problem.get('difficulty', {'depth': 2, 'length': 3}),
-                'ascii_solution': problem['ascii_solution'],
-                'json_solution': problem['json_solution'],
-                'metadata': {
-                    'line_count': len([line for line in problem['ascii_solution'].split('\n') if line.strip()]),
-                    'rules_used': extract_rules_from_json(problem['json_solution']),
-                    'subproof_depth': 0,  # Will be calculated from json_solution
-                    'total_steps': len(problem['json_solution'].get('solution', []))
-                },
-                'validation_result': problem['validation_result'],
-                'solved_at': datetime.now().isoformat(),
-                'model_used': 'deepseek/deepseek-chat',
-                'condition_used': 'baseline'
-            }
-            f.write(json.dumps(bank_entry, ensure_ascii=False) + '\n')
-            count += 1
+    # One timestamp for the batch; every line is built first and written in one call
+    solved_at = datetime.now().isoformat()
+    lines = []
+    for problem in problems_with_solutions:
+        bank_entry = {
+            'id': problem['id'],
+            'premises': problem['premises'],
+            'conclusion': problem['conclusion'],
+            'difficulty': problem.get('difficulty', {'depth': 2, 'length': 3}),
+            'ascii_solution': problem['ascii_solution'],
+            'json_solution': problem['json_solution'],
+            'metadata': {
+                'line_count': sum(1 for line in problem['ascii_solution'].split('\n') if line.strip()),
+                'rules_used': extract_rules_from_json(problem['json_solution']),
+                'subproof_depth': 0,  # Will be calculated from json_solution
+                'total_steps': len(problem['json_solution'].get('solution', []))
+            },
+            'validation_result': problem['validation_result'],
+            'solved_at': solved_at,
+            'model_used': HARVEST_MODEL,
+            'condition_used': 'baseline'
+        }
+        lines.append(json_dumps(bank_entry))
+    
+    # Never append a bare newline: an empty batch leaves the bank untouched
+    if lines:
+        with open(bank_file, 'ab') as f:
+            f.write(b'\n'.join(lines) + b'\n')
+    count = len(lines)
     
     print(f"✅ Added {count} problems to bank")
     return count
@@ -135,10 +137,10 @@ def extract_rules_from_json(json_proof):
     for step in json_proof.get('solution', []):
         justification = step.get('justification', '')
         if justification:
-            rule_match = justification.split()[0]
-            if rule_match and rule_match not in ['Pr', 'Hyp', 'R']:
+            rule_match = justification.split(maxsplit=1)[0]
+            if rule_match and rule_match not in SKIP_RULES:
                 rules_used.add(rule_match)
-    return list(rules_used)
+    return sorted(rules_used)
 
 def save_failures(failed_problems):
     """Save failed problems for later analysis"""
@@ -150,8 +152,8 @@ def save_failures(failed_problems):
     failures_file = Path(f"data/problems/failures_{timestamp}.json")
     failures_file.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(failures_file, 'w', encoding='utf-8') as f:
-        json.dump(failed_problems, f, indent=2)
+    # Serialized in one call and written as bytes
+    failures_file.write_bytes(json_dumps(failed_problems, indent=True))
     
     print(f"📝 Saved {len(failed_problems)} failures to {failures_file}")
 
@@ -177,7 +179,7 @@ def quick_harvest_workflow(batch_size=10, bundle="2"):
             premises=problem['premises'],
             conclusion=problem['conclusion'], 
             condition='baseline',
-            model='deepseek/deepseek-chat'
+            model=HARVEST_MODEL
         )
         results.append((problem, result))
         
@@ -5,47 +5,43 @@ Re-validates proofs that failed due to pipeline issues but look correct.
 Fixes the results CSV with proper validation.
 """
 
+import re
 import sys
-import json
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
 # FIX: Add parent directory to path so we can import from src/
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.ascii_to_json import convert_ascii_to_json
+from src.experiment_data import extract_ascii_proof_from_conversation, load_problem_lookup
 from src.proof_checker import check_proof
+from src.fastcsv import write_csv
 
+# Errors from parsing/conversion issues, which regrading cannot fix
+SKIP_PATTERNS = [
+    'ASCII→JSON conversion failed',
+    'ParseError',
+    'JSONDecodeError',
+    'conversion failed',
+    'parse failed'
+]
+SKIP_ERROR_RE = re.compile('|'.join(map(re.escape, SKIP_PATTERNS)))
 
+def load_results(results_csv) -> pd.DataFrame:
+    """
+    A fresh copy of the results table; the CSV is only reparsed when it has
+    changed since the last call, and callers may modify the copy freely.
+    """
+    path = Path(results_csv).resolve()
+    return _results_table(path, path.stat().st_mtime_ns).copy()
 
-def extract_ascii_proof_from_conversation(conversation_file: str) -> Optional[str]:
-    """Extract the final ASCII proof from a conversation file."""
-    try:
-        with open(conversation_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Look for the final proof (last code block)
-        code_blocks = []
-        in_code_block = False
-        current_block = []
-        
-        for line in content.split('\n'):
-            if line.strip().startswith('```') and not in_code_block:
-                in_code_block = True
-                current_block = []
-            elif line.strip().startswith('```') and in_code_block:
-                in_code_block = False
-                code_blocks.append('\n'.join(current_block))
-            elif in_code_block:
-                current_block.append(line)
-        
-        if code_blocks:
-            return code_blocks[-1]  # Return the last code block
-        return None
-    except Exception as e:
-        print(f"Error reading {conversation_file}: {e}")
-        return None
+@lru_cache(maxsize=16)
+def _results_table(path: Path, mtime_ns: int) -> pd.DataFrame:
+    return pd.read_csv(path)
 
 def regrade_single_proof(problem_id: str, condition: str, premises: List[str], conclusion: str, conversation_file: str) -> Dict[str, Any]:
     """Regrade a single proof attempt."""
@@ -101,14 +97,11 @@ def regrade_single_proof(problem_id: str, condition: str, premises: List[str], c
             'ascii_proof': ascii_proof
         }
 
-def regrade_experiment_results(experiment_dir: str, problems_file: str):
-    """Regrade all results in an experiment directory."""
+def regrade_experiment_results(experiment_dir: str, problems_file: str, max_workers: int = 8):
+    """Regrade all results in an experiment directory, up to max_workers proofs at a time."""
     
     # Load problems
-    with open(problems_file, 'r', encoding='utf-8') as f:
-        problems = json.load(f)
-    
-    problem_lookup = {p['id']: p for p in problems}
+    problem_lookup = load_problem_lookup(problems_file)
     
     # Load results
     results_csv = Path(experiment_dir) / "results.csv"
@@ -116,33 +109,26 @@ def regrade_experiment_results(experiment_dir: str, problems_file: str):
         print(f"❌ Results CSV not found: {results_csv}")
         return
     
-    df = pd.read_csv(results_csv)
+    df = load_results(results_csv)
     
     # Find failed proofs that might be fixable
     failed_proofs = df[df['solved'] == False]
     print(f"Found {len(failed_proofs)} failed proofs to potentially regrade")
     
     # NEW: Skip proofs that failed due to parsing/conversion issues
-    skip_patterns = [
-        'ASCII→JSON conversion failed',
-        'ParseError',
-        'JSONDecodeError',
-        'conversion failed',
-        'parse failed'
-    ]
-    
     fixable_failures = failed_proofs[
-        ~failed_proofs['error'].str.contains('|'.join(skip_patterns), na=False)
+        ~failed_proofs['error'].str.contains(SKIP_ERROR_RE, na=False)
     ]
     
     print(f"Skipping {len(failed_proofs) - len(fixable_failures)} proofs with parsing/conversion errors")
     print(f"Attempting to regrade {len(fixable_failures)} potentially fixable proofs")
     
-    regraded_results = []
-    
-    for _, row in fixable_failures.iterrows():
-        problem_id = row['problem_id']
-        condition = row['condition']
+    # Collect the proofs to regrade first; each one is an LLM conversion plus a
+    # PHP check, both of which wait on I/O, so they run concurrently below
+    jobs = []
+    for row in fixable_failures.itertuples(index=False):
+        problem_id = row.problem_id
+        condition = row.condition
         
         # Get problem details
         problem = problem_lookup.get(problem_id)
@@ -156,39 +142,48 @@ def regrade_experiment_results(experiment_dir: str, problems_file: str):
             print(f"⚠️  Conversation file not found: {conv_file}")
             continue
         
-        # Regrade this proof
-        regraded = regrade_single_proof(
-            problem_id=problem_id,
-            condition=condition,
-            premises=problem['premises'],
-            conclusion=problem['conclusion'],
-            conversation_file=str(conv_file)
-        )
-        
-        regraded_results.append(regraded)
-        
-        # Print result
-        status = "✅ SOLVED" if regraded['regraded_solved'] else "❌ STILL FAILED"
-        print(f"  {status}: {regraded.get('regraded_error', 'Validated successfully')}")
+        jobs.append({
+            'problem_id': problem_id,
+            'condition': condition,
+            'premises': problem['premises'],
+            'conclusion': problem['conclusion'],
+            'conversation_file': str(conv_file)
+        })
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(regrade_single_proof, **job) for job in jobs]
+        for future in as_completed(futures):
+            regraded = future.result()
+            
+            # Print result
+            status = "✅ SOLVED" if regraded['regraded_solved'] else "❌ STILL FAILED"
+            print(f"  {regraded['problem_id']} - {regraded['condition']} {status}: "
+                  f"{regraded.get('regraded_error', 'Validated successfully')}")
+    # Kept in CSV row order
+    regraded_results = [future.result() for future in futures]
     
     
     # Create regraded results DataFrame
     if regraded_results:
         regraded_df = pd.DataFrame(regraded_results)
         
-        # Merge with original results
-        for _, regraded in regraded_df.iterrows():
-            mask = (df['problem_id'] == regraded['problem_id']) & (df['condition'] == regraded['condition'])
-            if regraded['regraded_solved']:
-                df.loc[mask, 'solved'] = True
-                df.loc[mask, 'error'] = ''
-                df.loc[mask, 'validation_issues'] = '[]'
-                if 'ascii_proof' in regraded and regraded['ascii_proof']:
-                    df.loc[mask, 'ascii_proof'] = regraded['ascii_proof']
+        # Merge with original results: one key lookup marks every fixed row,
+        # instead of rescanning df for each regraded proof
+        fixed = regraded_df[regraded_df['regraded_solved'].astype(bool)]
+        fixed = fixed.drop_duplicates(['problem_id', 'condition'], keep='last').set_index(['problem_id', 'condition'])
+        row_keys = pd.MultiIndex.from_frame(df[['problem_id', 'condition']])
+        mask = row_keys.isin(fixed.index)
+        df.loc[mask, 'solved'] = True
+        df.loc[mask, 'error'] = ''
+        df.loc[mask, 'validation_issues'] = '[]'
+        proofs = fixed['ascii_proof'].dropna()
+        new_proofs = proofs[proofs != ''].reindex(row_keys)
+        has_proof = new_proofs.notna().to_numpy()
+        df.loc[has_proof, 'ascii_proof'] = new_proofs.to_numpy()[has_proof]
         
         # Save updated results
         regraded_csv = Path(experiment_dir) / "results_regraded.csv"
-        df.to_csv(regraded_csv, index=False)
+        write_csv(df, regraded_csv)
         
         # Print summary
         fixed_count = regraded_df['regraded_solved'].sum()
@@ -207,43 +202,33 @@ def analyze_fixable_failures(experiment_dir: str):
     """Analyze which failures might be fixable by looking at conversation files."""
     
     results_csv = Path(experiment_dir) / "results.csv"
-    df = pd.read_csv(results_csv)
+    df = load_results(results_csv)
     
     failed_proofs = df[df['solved'] == False]
     print(f"Analyzing {len(failed_proofs)} failed proofs...")
     
-    potentially_fixable = []
+    conv_dir = Path(experiment_dir) / "conversations"
+    conv_files = [conv_dir / f"{problem_id}_{condition}_conv.txt"
+                  for problem_id, condition in zip(failed_proofs['problem_id'], failed_proofs['condition'])]
+    has_file = [conv_file.exists() for conv_file in conv_files]
     
-    for _, row in failed_proofs.iterrows():
-        problem_id = row['problem_id']
-        condition = row['condition']
-        
-        conv_file = Path(experiment_dir) / "conversations" / f"{problem_id}_{condition}_conv.txt"
-        if conv_file.exists():
-            # Quick check: see if there's a proof in the conversation
-            ascii_proof = extract_ascii_proof_from_conversation(str(conv_file))
-            if ascii_proof and 'Pr' in ascii_proof and any(line.strip() for line in ascii_proof.split('\n') if '|' in line):
-                potentially_fixable.append({
-                    'problem_id': problem_id,
-                    'condition': condition,
-                    'has_proof': True,
-                    'proof_length': len(ascii_proof)
-                })
-            else:
-                potentially_fixable.append({
-                    'problem_id': problem_id,
-                    'condition': condition,
-                    'has_proof': False
-                })
-        else:
-            potentially_fixable.append({
-                'problem_id': problem_id,
-                'condition': condition,
-                'has_proof': False,
-                'reason': 'No conversation file'
-            })
+    # Quick check: see if there's a proof in each conversation (the reads overlap in threads)
+    with ThreadPoolExecutor() as executor:
+        found = list(executor.map(extract_ascii_proof_from_conversation,
+                                  [str(conv_file) for conv_file, exists in zip(conv_files, has_file) if exists]))
+    found = iter(found)
+    ascii_proofs = [next(found) if exists else None for exists in has_file]
+    has_proof = [bool(ascii_proof and 'Pr' in ascii_proof
+                      and any(line.strip() for line in ascii_proof.split('\n') if '|' in line))
+                 for ascii_proof in ascii_proofs]
     
-    fixable_df = pd.DataFrame(potentially_fixable)
+    fixable_df = pd.DataFrame({
+        'problem_id': failed_proofs['problem_id'].to_numpy(),
+        'condition': failed_proofs['condition'].to_numpy(),
+        'has_proof': has_proof,
+        'proof_length': [len(ascii_proof) if ok else float('nan') for ascii_proof, ok in zip(ascii_proofs, has_proof)],
+        'reason': [None if exists else 'No conversation file' for exists in has_file]
+    })
     fixable_count = fixable_df['has_proof'].sum()
     
     print(f"\n🔍 FIXABILITY ANALYSIS")
@@ -253,12 +238,18 @@ def analyze_fixable_failures(experiment_dir: str):
     
     if fixable_count > 0:
         print(f"\nPotentially fixable proofs:")
-        for _, row in fixable_df[fixable_df['has_proof'] == True].iterrows():
-            print(f"  {row['problem_id']} - {row['condition']}")
+        for row in fixable_df[fixable_df['has_proof']].itertuples(index=False):
+            print(f"  {row.problem_id} - {row.condition}")
     
     return fixable_df
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Regrade failed proofs in an experiment run')
+    parser.add_argument('--workers', type=int, default=8, help='Number of proofs regraded at once')
+    args = parser.parse_args()
+    
     experiment_dir = "data/results/medium_50_2025-10-23_191912"
     problems_file = "data/problems/50_medium_problems.json"
     
@@ -268,6 +259,6 @@ if __name__ == "__main__":
     
     if fixable_df['has_proof'].sum() > 0:
         print(f"\n🔄 Starting regrading...")
-        regrade_experiment_results(experiment_dir, problems_file)
+        regrade_experiment_results(experiment_dir, problems_file, max_workers=args.workers)
     else:
         print("❌ No fixable failures found")
\ No newline at end of file
@@ -4,10 +4,16 @@ Merges error results from the original output file with successful results from
 """
 
 import json
+import sys
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Any
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.fastcsv import write_csv
+
 def rescue_experiment_results(experiment_dir: str, original_output: str):
     """Rescue results from the bug where error results were saved to wrong location."""
     
@@ -25,7 +31,7 @@ def rescue_experiment_results(experiment_dir: str, original_output: str):
     if original_csv.exists():
         df2 = pd.read_csv(original_csv)
         # Filter for error results (the ones that were mis-saved)
-        error_results = df2[df2['error'].str.contains('Exception', na=False)]
+        error_results = df2[df2['error'].str.contains('Exception', na=False, regex=False)]
         print(f"Found {len(error_results)} error results in original CSV")
         dfs.append(error_results)
     
@@ -35,7 +41,7 @@ def rescue_experiment_results(experiment_dir: str, original_output: str):
         
         # Save rescued results
         rescued_csv = Path(experiment_dir) / "results_rescued.csv"
-        merged_df.to_csv(rescued_csv, index=False)
+        write_csv(merged_df, rescued_csv)
         print(f"✅ Saved {len(merged_df)} rescued results to: {rescued_csv}")
         
         return merged_df
@@ -58,10 +64,10 @@ def analyze_rescued_results(rescued_df: pd.DataFrame):
     
     # By condition
     print("\nBy condition:")
-    for condition in rescued_df['condition'].unique():
-        cond_df = rescued_df[rescued_df['condition'] == condition]
-        cond_solved = cond_df['solved'].sum()
-        print(f"  {condition}: {cond_solved}/{len(cond_df)} ({cond_solved/len(cond_df)*100:.1f}%)")
+    # One grouped pass instead of a filtered copy per condition (in order of appearance)
+    by_condition = rescued_df.groupby('condition', sort=False)['solved'].agg(['sum', 'size'])
+    for condition, cond_solved, cond_total in by_condition.itertuples():
+        print(f"  {condition}: {cond_solved}/{cond_total} ({cond_solved/cond_total*100:.1f}%)")
     
     # Error analysis
     errors = rescued_df[rescued_df['error'].notna() & (rescued_df['error'] != '')]
@@ -9,12 +9,17 @@ Runs the Fitch protocol experiment:
 
 import sys
 import io
-import json
 import csv
+import itertools
+import json
+import re
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Set, Tuple
 
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -22,8 +27,14 @@ if sys.platform == "win32":
 # Add parent directory to path so we can import from src/
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.fastjson import dumps as json_dumps, loads as json_loads
 from src.proof_solver import solve_proof
 
+# Rule between the turns of a run's conversation log
+RUN_LOG_SEP = "=" * 60 + "\n"
+# Insignificant whitespace between JSON tokens
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
 def create_experiment_directory(output_file: str) -> tuple[str, str]:
     """
     Creates a unique experiment directory to avoid overwriting.
@@ -57,52 +68,10 @@ def create_experiment_directory(output_file: str) -> tuple[str, str]:
     return str(csv_path), str(conversations_dir)
 
 
-def save_conversation(
-    problem_id: str,
-    condition: str,
-    conversation: List[Dict[str, str]],
-    output_dir: str = "data/results/conversations"
-):
-    """
-    Save a conversation to a readable text file.
-    
-    Args:
-        problem_id: ID of the problem (e.g., 'test_001')
-        condition: Experimental condition (baseline/multi_shot/protocol)
-        conversation: List of message dicts with 'role' and 'content'
-        output_dir: Directory to save conversation files
+def load_problems(problems_file: str, max_problems: int = None) -> List[Dict[str, Any]]:
     """
-    from pathlib import Path
-    
-    # Create directory if needed
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    
-    # Filename: test_001_protocol_conv.txt
-    filename = f"{problem_id}_{condition}_conv.txt"
-    filepath = Path(output_dir) / filename
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"Problem: {problem_id}\n")
-        f.write(f"Condition: {condition}\n")
-        f.write("="*70 + "\n\n")
-        
-        for i, msg in enumerate(conversation, 1):
-            role = msg['role'].upper()
-            content = msg['content']
-            
-            f.write(f"{'='*70}\n")
-            f.write(f"TURN {i}: {role}\n")
-            f.write(f"{'='*70}\n")
-            f.write(f"{content}\n\n")
-        
-        f.write(f"{'='*70}\n")
-        f.write(f"END OF CONVERSATION\n")
-        f.write(f"{'='*70}\n")
-
-
-def load_problems(problems_file: str) -> List[Dict[str, Any]]:
-    """
-    Load proof problems from JSON file.
+    Load proof problems from JSON file; with max_problems, only the first
+    max_problems are decoded and the rest of the array is never parsed.
     
     Expected format:
     [
@@ -115,58 +84,219 @@ def load_problems(problems_file: str) -> List[Dict[str, Any]]:
         ...
     ]
     """
-    with open(problems_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    if not max_problems:
+        return json_loads(Path(problems_file).read_bytes())
+    text = Path(problems_file).read_text(encoding='utf-8')
+    return list(itertools.islice(iter_json_array(text), max_problems))
 
 
-def save_result(result: Dict[str, Any], output_file: str):
-    """Append a single result to CSV file with FULL logging."""
-    fieldnames = [
-        'timestamp',
-        'problem_id',
-        'condition',
-        'model',
-        'premises',
-        'conclusion',
-        'solved',
-        'time_seconds',
-        'conversation_turns',
-        # NEW: Save all the intermediate data!
-        'ascii_proof',           # The raw ASCII the LLM generated
-        'json_proof',            # The flat JSON with assumeno
-        'conversation_history',  # Full message history
-        'error',
-        'validation_issues'
-    ]
+def iter_json_array(text: str) -> Iterator[Any]:
+    """Decode the items of a top-level JSON array one at a time, as they are reached."""
+    decoder = json.JSONDecoder()
+    pos = JSON_WHITESPACE.match(text, 0).end()
+    if not text.startswith('[', pos):
+        raise ValueError(f"Expected a JSON array at position {pos}")
+    pos = JSON_WHITESPACE.match(text, pos + 1).end()
+    if text.startswith(']', pos):
+        return
+    while True:
+        item, pos = decoder.raw_decode(text, pos)
+        yield item
+        pos = JSON_WHITESPACE.match(text, pos).end()
+        if text.startswith(']', pos):
+            return
+        if not text.startswith(',', pos):
+            raise ValueError(f"Expected ',' or ']' at position {pos}")
+        pos = JSON_WHITESPACE.match(text, pos + 1).end()
+
+
+def json_text(obj) -> str:
+    """Compact JSON for a CSV cell (orjson when installed), non-ASCII left as is."""
+    return json_dumps(obj).decode('utf-8')
+
+
+RESULT_FIELDS = [
+    'timestamp',
+    'problem_id',
+    'condition',
+    'model',
+    'premises',
+    'conclusion',
+    'solved',
+    'time_seconds',
+    'conversation_turns',
+    # NEW: Save all the intermediate data!
+    'ascii_proof',           # The raw ASCII the LLM generated
+    'json_proof',            # The flat JSON with assumeno
+    'conversation_history',  # Full message history
+    'error',
+    'validation_issues'
+]
+
+
+class ResultWriter:
+    """
+    Appends results to a CSV file with FULL logging, through one open file
+    and csv.writer for the whole run instead of a reopen per row. Rows are
+    positional tuples in RESULT_FIELDS order, so no per-row dict lookups.
+    The header is only written into an empty file, together with its first
+    row, so a run that writes nothing leaves the file as it was.
+    Rows are flushed every FLUSH_EVERY writes and on exit; write() may be
+    called from any thread.
+    """
+    FLUSH_EVERY = 32
     
-    file_exists = Path(output_file).exists()
+    def __init__(self, output_file: str):
+        self.output_file = Path(output_file)
+        self._lock = threading.Lock()
+        self._rows = 0
+        # Every problem is written once per condition; encode its premises once
+        self._premises_json = {}
     
-    with open(output_file, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    def __enter__(self):
+        self._file = open(self.output_file, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        # Decided once per run; the header goes out with the first row
+        self._header_written = self._file.tell() > 0
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+    
+    def write(self, result: Dict[str, Any]):
+        """Append a single result."""
+        premises_key = tuple(result['premises'])
+        premises_json = self._premises_json.get(premises_key)
+        if premises_json is None:
+            premises_json = self._premises_json[premises_key] = json_text(result['premises'])
         
-        if not file_exists:
-            writer.writeheader()
+        # Runs are stamped with when they started (attempt_problem records it);
+        # rows written without that fall back to the time of writing
+        started_at_ns = result.get('started_at_ns')
+        started_at = datetime.fromtimestamp(started_at_ns / 1e9) if started_at_ns else datetime.now()
         
-        # Prepare row with ALL the data
-        row = {
-            'timestamp': datetime.now().isoformat(),
-            'problem_id': result.get('problem_id', 'unknown'),
-            'condition': result['condition'],
-            'model': result['model'],
-            'premises': json.dumps(result['premises'], ensure_ascii=False),
-            'conclusion': result['conclusion'],
-            'solved': result['solved'],
-            'time_seconds': round(result['time_seconds'], 2),
-            'conversation_turns': result['conversation_turns'],
+        # Prepare row with ALL the data, in RESULT_FIELDS order
+        row = (
+            started_at.isoformat(),
+            result.get('problem_id', 'unknown'),
+            result['condition'],
+            result['model'],
+            premises_json,
+            result['conclusion'],
+            result['solved'],
+            round(result['time_seconds'], 2),
+            result['conversation_turns'],
             # Save the actual proofs and conversation!
-            'ascii_proof': result.get('ascii_proof', ''),
-            'json_proof': json.dumps(result.get('json_proof', {}), ensure_ascii=False),
-            'conversation_history': json.dumps(result.get('conversation_history', []), ensure_ascii=False),
-            'error': result.get('error', ''),
-            'validation_issues': json.dumps((result.get('validation') or {}).get('issues', []), ensure_ascii=False)
-        }
+            result.get('ascii_proof', ''),
+            json_text(result.get('json_proof', {})),
+            json_text(result.get('conversation_history', [])),
+            result.get('error', ''),
+            json_text((result.get('validation') or {}).get('issues', []))
+        )
         
-        writer.writerow(row)
+        with self._lock:
+            if not self._header_written:
+                self._writer.writerow(RESULT_FIELDS)
+                self._header_written = True
+            self._writer.writerow(row)
+            self._rows += 1
+            if self._rows % self.FLUSH_EVERY == 0:
+                self._file.flush()
+
+
+def save_run_conversation(result: Dict[str, Any], conversations_dir: str) -> str:
+    """Write one run's conversation log into conversations_dir; returns the file name."""
+    conv_filename = f"{result['problem_id']}_{result['condition']}_conv.txt"
+    conv_path = Path(conversations_dir) / conv_filename
+    
+    # The whole log is built in memory and written in one call
+    parts = []
+    for i, msg in enumerate(result.get('conversation_history', [])):
+        parts += [RUN_LOG_SEP, f"Turn {i+1} - {msg['role']}\n", RUN_LOG_SEP, msg['content'], "\n\n"]
+    
+    with open(conv_path, 'w', encoding='utf-8') as f:
+        f.write("".join(parts))
+    
+    return conv_filename
+
+
+def attempt_problem(problem: Dict[str, Any], condition: str, model: str,
+                    conversations_dir: str = None) -> Dict[str, Any]:
+    """
+    Solve one problem under one condition. A solver exception, or a failure
+    to write the conversation log, is logged and recorded in the returned
+    result, so one bad run never stops the others.
+    With conversations_dir, the conversation log is written here in the
+    worker, so file creation overlaps across runs instead of queueing up
+    behind the thread that collects results.
+    """
+    started_at_ns = time.time_ns()
+    try:
+        result = solve_proof(
+            premises=problem['premises'],
+            conclusion=problem['conclusion'],
+            condition=condition,
+            model=model
+        )
+    except Exception as e:
+        print(f"  ✗ EXCEPTION in {problem['id']} ({condition}): {e}")
+        print("\nFull traceback:")
+        traceback.print_exc()
+        # Log the exception
+        result = {
+            'condition': condition,
+            'model': model,
+            'premises': problem['premises'],
+            'conclusion': problem['conclusion'],
+            'solved': False,
+            'time_seconds': 0,
+            'conversation_turns': 0,
+            'error': f'Exception: {e}'
+        }
+    
+    result['problem_id'] = problem['id']
+    result['started_at_ns'] = started_at_ns
+    if conversations_dir and 'conversation_history' in result:
+        try:
+            result['conversation_file'] = save_run_conversation(result, conversations_dir)
+        except OSError as e:
+            # The run itself (and what it cost) still gets its row; only the log is lost.
+            # Not an 'Exception:' error, so --resume does not redo the run for it.
+            print(f"  ✗ Could not save the conversation for {problem['id']} ({condition}): {e}")
+            log_error = f'Conversation log not saved: {e}'
+            result['error'] = f"{result['error']}; {log_error}" if result.get('error') else log_error
+    return result
+
+
+def prune_failed_runs(csv_path: str) -> Set[Tuple[str, str]]:
+    """
+    Prepare csv_path for a resume: rows of runs that ended in an exception
+    are dropped from the file, since resuming retries those runs and their
+    new rows replace them. Finished runs are kept whether or not they solved
+    the problem; their (problem_id, condition) pairs are returned.
+    """
+    if not Path(csv_path).exists():
+        return set()
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return set()
+    
+    header, rows = rows[0], rows[1:]
+    problem_col, condition_col, error_col = (header.index(field) for field in ('problem_id', 'condition', 'error'))
+    kept = [row for row in rows if not row[error_col].startswith('Exception:')]
+    
+    if len(kept) < len(rows):
+        # Written aside and swapped in, so an interrupted rewrite loses nothing
+        tmp_path = Path(csv_path).with_suffix('.csv.tmp')
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(kept)
+        tmp_path.replace(csv_path)
+        print(f" Dropped {len(rows) - len(kept)} failed runs from {csv_path}; they will be retried")
+    
+    return {(row[problem_col], row[condition_col]) for row in kept}
 
 
 def run_experiment(
@@ -174,7 +304,9 @@ def run_experiment(
     output_file: str,
     conditions: List[str] = ['baseline', 'multi_shot', 'protocol'],
     model: str = 'gpt-4',
-    max_problems: int = None
+    max_problems: int = None,
+    max_workers: int = 4,
+    resume_dir: str = None
 ):
     """
     Run the full experiment.
@@ -184,90 +316,72 @@ def run_experiment(
         output_file: Path to output CSV file
         conditions: List of conditions to test
         model: LLM model to use
-        max_problems: Limit number of problems (None = all)0
+        max_problems: Limit number of problems (None = all)
+        max_workers: Number of runs in flight at once; each run waits on the
+            LLM, so they overlap in threads. Results are written from this
+            thread only, in the order the runs finish.
+        resume_dir: An earlier experiment directory to continue; runs it
+            already completed are skipped, runs that raised are retried in
+            place of their old rows, and new results are appended
     """
-      # Create experiment directory
-    csv_path, conversations_dir = create_experiment_directory(output_file)
+    if resume_dir:
+        # Continue an earlier experiment directory instead of creating one
+        csv_path = str(Path(resume_dir) / "results.csv")
+        conversations_dir = str(Path(resume_dir) / "conversations")
+        Path(conversations_dir).mkdir(parents=True, exist_ok=True)
+        done = prune_failed_runs(csv_path)
+        print(f" Resuming {resume_dir}: {len(done)} runs already completed\n")
+    else:
+        # Create experiment directory
+        csv_path, conversations_dir = create_experiment_directory(output_file)
+        done = set()
     
     print(f"Loading problems from {problems_file}...")
-    problems = load_problems(problems_file)
-    
-
-    
-    if max_problems:
-        problems = problems[:max_problems]
+    problems = load_problems(problems_file, max_problems)
     
     print(f"Running experiment: {len(problems)} problems × {len(conditions)} conditions = {len(problems) * len(conditions)} total runs")
     print(f"Model: {model}")
     print(f"Output: {output_file}\n")
     
-    total_runs = len(problems) * len(conditions)
-    current_run = 0
+    runs = [(problem, condition) for problem in problems for condition in conditions
+            if (problem['id'], condition) not in done]
+    total_runs = len(runs)
+    if total_runs < len(problems) * len(conditions):
+        print(f"Skipping {len(problems) * len(conditions) - total_runs} runs completed earlier\n")
     
-    for problem in problems:
-        problem_id = problem['id']
-        premises = problem['premises']
-        conclusion = problem['conclusion']
-        
-        print(f"\n{'='*60}")
-        print(f"Problem {problem_id}")
-        print(f"Premises: {', '.join(premises)}")
-        print(f"Conclusion: {conclusion}")
-        print(f"{'='*60}")
-        
-        for condition in conditions:
-            current_run += 1
-            print(f"\n[{current_run}/{total_runs}] Testing condition: {condition}")
-            
-            try:
-                result = solve_proof(
-                    premises=premises,
-                    conclusion=conclusion,
-                    condition=condition,
-                    model=model
-                )
-                
-                result['problem_id'] = problem_id
+    with ResultWriter(csv_path) as results, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(attempt_problem, problem, condition, model, conversations_dir)
+            for problem, condition in runs
+        ]
+        try:
+            for current_run, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                problem_id = result['problem_id']
+                condition = result['condition']
+                print(f"\n[{current_run}/{total_runs}] {problem_id} - {condition}")
                 
                 # Save result to CSV
-                save_result(result, csv_path)  # Use csv_path instead of output_file
-                
-                # NEW: Save conversation log
-                conv_filename = f"{problem_id}_{condition}_conv.txt"
-                conv_path = Path(conversations_dir) / conv_filename
+                results.write(result)
                 
-                with open(conv_path, 'w', encoding='utf-8') as f:
-                    for i, msg in enumerate(result.get('conversation_history', [])):
-                        f.write(f"{'='*60}\n")
-                        f.write(f"Turn {i+1} - {msg['role']}\n")
-                        f.write(f"{'='*60}\n")
-                        f.write(msg['content'])
-                        f.write(f"\n\n")
+                if 'conversation_history' not in result:
+                    # The run raised before there was a conversation to keep
+                    print(f"  ✗ {result['error']}")
+                    continue
                 
                 # Print summary
                 status = "✅ SOLVED" if result['solved'] else "❌ FAILED"
                 print(f"  {status} in {result['time_seconds']:.2f}s ({result['conversation_turns']} turns)")
-                print(f"     Conversation saved to: {conv_filename}")
+                if 'conversation_file' in result:
+                    print(f"     Conversation saved to: {result['conversation_file']}")
                 if result['error']:
                     print(f"  Error: {result['error']}")
-                
-            except Exception as e:
-                print(f"  ✗ EXCEPTION: {e}")
-                print("\nFull traceback:")
-                traceback.print_exc() 
-                # Log the exception
-                error_result = {
-                    'problem_id': problem_id,
-                    'condition': condition,
-                    'model': model,
-                    'premises': premises,
-                    'conclusion': conclusion,
-                    'solved': False,
-                    'time_seconds': 0,
-                    'conversation_turns': 0,
-                    'error': f'Exception: {e}'
-                }
-                save_result(error_result, csv_path)
+        except BaseException:
+            # Ctrl-C or a failing results CSV: drop the runs still queued, so only
+            # the ones already in flight finish (and get paid for). A run's own
+            # failures, including its conversation log, never get here.
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
     
     print(f"\n{'='*60}")
     print(f"Experiment complete! Results saved to {csv_path}")
@@ -289,6 +403,10 @@ if __name__ == "__main__":
                    help='LLM model to use')
     parser.add_argument('--max-problems', type=int, default=None,
                        help='Maximum number of problems to test')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Number of runs to have in flight at once')
+    parser.add_argument('--resume', type=str, default=None, metavar='EXPERIMENT_DIR',
+                       help='Continue an earlier experiment directory, skipping runs it already completed')
     
     args = parser.parse_args()  # ← THIS LINE IS CRITICAL
     
@@ -297,5 +415,7 @@ if __name__ == "__main__":
         output_file=args.output,
         conditions=args.conditions,
         model=args.model,
-        max_problems=args.max_problems
+        max_problems=args.max_problems,
+        max_workers=args.workers,
+        resume_dir=args.resume
     )
\ No newline at end of file
@@ -1,7 +1,13 @@
 # experiments/test_gpt5_simple.py
-import os, litellm
+import os, sys, litellm
+from pathlib import Path
 from litellm import completion
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.llm_call import call_with_retry
+
 print("Testing GPT-5 access...")
 print(f"API key set: {'OPENAI_API_KEY' in os.environ}")
 
@@ -12,7 +18,9 @@ except Exception:
 
 MODEL = "gpt-5"  # <-- use real id, not 'gpt5'
 
-resp = completion(
+# Retried with backoff on rate limits, timeouts and empty replies
+resp = call_with_retry(
+    completion,
     model=MODEL,
     messages=[{"role": "user", "content": "Say 'hello' exactly."}],
     temperature=1,    # GPT-5 chat quirk: only 1 is supported
@@ -16,6 +16,10 @@ import sys
 # FIX: Add parent directory to path so we can import from src/
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src import llm_cache
+
+# Justifications that are not inference rules: premises, hypotheses, reiteration
+SKIP_RULES = frozenset({'Pr', 'Hyp', 'R'})
 
 
 class ParseError(Exception):
@@ -236,14 +240,21 @@ Conclusion: {conclusion}
 
 Return ONLY the JSON object, no additional text."""
 
+    messages = [{"role": "user", "content": full_prompt}]
+    # The conversion is deterministic, so a reply already validated for this
+    # exact request (e.g. when regrading) is reused instead of paid for again
+    cache_key = llm_cache.cache_key(model, messages, 0)
+    
     try:
-        response = completion(
-            model=model,
-            messages=[{"role": "user", "content": full_prompt}],
-            temperature=0
-        )
-        
-        response_text = response.choices[0].message.content.strip()
+        response_text = llm_cache.lookup(cache_key)
+        if response_text is None:
+            response = completion(
+                model=model,
+                messages=messages,
+                temperature=0
+            )
+            
+            response_text = response.choices[0].message.content.strip()
         
         # Try to extract JSON if wrapped in markdown code blocks
         if response_text.startswith("```"):
@@ -267,6 +278,7 @@ Return ONLY the JSON object, no additional text."""
             if not all(key in line for key in ['formula', 'justification', 'assumeno']):
                 raise ValueError(f"Line {i} missing required keys")
         
+        llm_cache.store(cache_key, response_text)
         return result
         
     except json.JSONDecodeError as e:
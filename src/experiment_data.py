@@ -0,0 +1,46 @@
+"""Reading an experiment's inputs and logs back in, for the regrading scripts"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.fastjson import loads as json_loads
+
+
+def load_problem_lookup(problems_file: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """Problems keyed by id; reparsed only when the file has changed since the last call."""
+    path = Path(problems_file).resolve()
+    return _problem_lookup(path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _problem_lookup(path: Path, mtime_ns: int) -> Dict[str, Dict[str, Any]]:
+    problems = json_loads(path.read_bytes())
+    return {p['id']: p for p in problems}
+
+
+def extract_ascii_proof_from_conversation(conversation_file: Union[str, Path]) -> Optional[str]:
+    """Extract the final ASCII proof (the last complete code block) from a conversation file."""
+    try:
+        # The file is streamed, so only the block being read and the last
+        # finished one are held
+        last_block = None
+        current_block = None
+        with open(conversation_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip().startswith('```'):
+                    if current_block is None:
+                        current_block = []
+                    else:
+                        last_block = current_block
+                        current_block = None
+                elif current_block is not None:
+                    current_block.append(line)
+
+        if last_block is not None:
+            # Every line in a closed block ends in a newline; drop the last one
+            return ''.join(last_block)[:-1]
+        return None
+    except Exception as e:
+        print(f"Error reading {conversation_file}: {e}")
+        return None
@@ -0,0 +1,27 @@
+"""CSV writing through pyarrow when it is installed, with a pandas fallback"""
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional
+    pa = None
+
+
+def write_csv(df, path):
+    """
+    Write df to path without its index.
+    pyarrow quotes every string and writes booleans as true/false, which
+    pd.read_csv parses like pandas' own output. Floats are written without a
+    trailing .0, though, so a float column holding only whole numbers reads
+    back as int64 unless read_csv is given its dtype.
+    Columns arrow cannot type (mixed objects) go through df.to_csv instead.
+    """
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        else:
+            pacsv.write_csv(table, str(path))
+            return
+    df.to_csv(path, index=False)
@@ -0,0 +1,28 @@
+"""JSON encoding and decoding through orjson when it is installed, with a stdlib fallback"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def loads(data):
+    """Parse a JSON document given as str or (UTF-8) bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes, leaving non-ASCII characters unescaped.
+    Output is compact unless indent is set, which indents by two spaces.
+    Both backends give equivalent JSON, though not always byte-identical.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,160 @@
+"""Tokenizer, parser and tuple ASTs for the internal formula syntax used by the entailment finders"""
+
+import re
+
+# Token kinds
+ATOM = 'ATOM'
+LPAREN = 'LPAREN'
+RPAREN = 'RPAREN'
+NOT = 'NOT'
+BINOP = 'BINOP'
+
+PUNCTUATION_TOKENS = {
+    '(': (LPAREN, '('),
+    ')': (RPAREN, ')'),
+    '~': (NOT, '~'),
+}
+
+# One alternation per token kind; any other non-space character is an error
+TOKEN_RE = re.compile(r'(<->|->|&|\|)|([()~])|([A-Za-z0-9]+)|(\S)')
+
+
+def tokenize(formula_str: str) -> list:
+    """
+    Split a formula string such as '((P & Q) -> (~R))' into a list of
+    (kind, payload) tuples with one precompiled regex scan.
+    Raises ValueError on characters outside the formula syntax.
+    """
+    tokens = []
+    for binop, punct, atom, bad in TOKEN_RE.findall(formula_str):
+        if binop:
+            tokens.append((BINOP, binop))
+        elif punct:
+            tokens.append(PUNCTUATION_TOKENS[punct])
+        elif atom:
+            tokens.append((ATOM, atom))
+        else:
+            raise ValueError(f"Unexpected character {bad!r} in formula: {formula_str}")
+    return tokens
+
+
+# Tuple AST node tags: ('atom', 'P'), ('un', '~', sub), ('bin', op, left, right)
+ATOM_NODE = 'atom'
+UNARY_NODE = 'un'
+BINARY_NODE = 'bin'
+
+# Work stack marker for a node whose children have been folded in fold_ast
+REDUCE = 'reduce'
+
+
+# Binding strength of the binary connectives; '~' binds tighter than all of them
+BINARY_PRECEDENCE = {'<->': 1, '->': 2, '|': 3, '&': 4}
+RIGHT_ASSOCIATIVE = {'->'}
+
+
+def parse_formula(formula_str: str, atoms) -> tuple:
+    """
+    Parse a formula string into a tuple AST in a single pass over its tokens.
+    Parentheses are optional where precedence decides, so '((P & Q) -> (~R))'
+    and 'P & Q -> ~R' give the same tree. Only names in atoms are accepted.
+    Raises ValueError if malformed.
+    """
+    tokens = tokenize(formula_str)
+    try:
+        node, pos = parse_expr(tokens, 0, atoms)
+    except IndexError:
+        raise ValueError(f"Unexpected end of formula: {formula_str}") from None
+    if pos != len(tokens):
+        raise ValueError(f"Could not parse formula: {formula_str}")
+    return node
+
+
+def parse_expr(tokens: list, pos: int, atoms, min_precedence: int = 1):
+    """
+    Recursive-descent (precedence climbing) parser over tokenize() output.
+    Returns (node, next_pos) for the longest expression starting at pos whose
+    binary connectives all bind at least as tightly as min_precedence.
+    """
+    node, pos = _parse_operand(tokens, pos, atoms)
+    while pos < len(tokens) and tokens[pos][0] == BINOP:
+        op_str = tokens[pos][1]
+        precedence = BINARY_PRECEDENCE[op_str]
+        if precedence < min_precedence:
+            break
+        next_min = precedence if op_str in RIGHT_ASSOCIATIVE else precedence + 1
+        right, pos = parse_expr(tokens, pos + 1, atoms, next_min)
+        node = (BINARY_NODE, op_str, node, right)
+    return node, pos
+
+
+def _parse_operand(tokens: list, pos: int, atoms):
+    kind, payload = tokens[pos]
+    if kind == ATOM:
+        if payload not in atoms:
+            raise ValueError(f"Unknown atom {payload!r} in formula")
+        return (ATOM_NODE, payload), pos + 1
+    if kind == NOT:
+        sub, pos = _parse_operand(tokens, pos + 1, atoms)
+        return (UNARY_NODE, payload, sub), pos
+    if kind == LPAREN:
+        node, pos = parse_expr(tokens, pos + 1, atoms)
+        if tokens[pos][0] != RPAREN:
+            raise ValueError("Expected ')' in formula")
+        return node, pos + 1
+    raise ValueError(f"Unexpected {payload!r} in formula")
+
+
+def fold_ast(node: tuple, atom_values: dict, negate, combine, memo: dict = None):
+    """
+    Evaluate a tuple AST bottom-up with an explicit stack. Atoms are looked up
+    in atom_values, ('un', '~', x) becomes negate(x) and ('bin', op, a, b)
+    becomes combine(op, a, b). Children are folded left before right.
+    If memo is given, the value of every compound subformula is stored in it
+    and reused when the same subformula turns up again, here or in a later
+    call; only pass one when negate and combine have no side effects.
+    Raises ValueError on unknown atoms or node tags.
+    """
+    values = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        tag = item[0]
+        if memo is not None and tag != REDUCE and item in memo:
+            values.append(memo[item])
+        elif tag == ATOM_NODE:
+            if item[1] not in atom_values:
+                raise ValueError(f"Unknown atom {item[1]!r} in formula")
+            values.append(atom_values[item[1]])
+        elif tag == UNARY_NODE:
+            stack += ((REDUCE, item), item[2])
+        elif tag == BINARY_NODE:
+            # Pushed in reverse so the left child is folded first
+            stack += ((REDUCE, item), item[3], item[2])
+        elif tag == REDUCE:
+            if item[1][0] == UNARY_NODE:
+                values[-1] = negate(values[-1])
+            else:
+                b = values.pop()
+                values[-1] = combine(item[1][1], values[-1], b)
+            if memo is not None:
+                memo[item[1]] = values[-1]
+        else:
+            raise ValueError(f"Unknown formula node: {item!r}")
+    return values[0]
+
+
+def ast_to_str(node: tuple) -> str:
+    """Render a tuple AST in the fully parenthesized string syntax, e.g. '((P & Q) -> (~R))'."""
+    parts = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif item[0] == ATOM_NODE:
+            parts.append(item[1])
+        elif item[0] == UNARY_NODE:
+            stack += (')', item[2], '(' + item[1])
+        else:
+            stack += (')', item[3], f' {item[1]} ', item[2], '(')
+    return ''.join(parts)
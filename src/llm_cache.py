@@ -0,0 +1,67 @@
+"""
+LLM Reply Cache
+
+Keeps replies to deterministic (temperature 0) completions in a SQLite file,
+keyed by a SHA-256 of the model, messages and temperature, so reruns such as
+regrading the same proofs do not pay for the same completion twice.
+Sampled completions are never cached: their variance is what the experiment
+measures.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_FILE = Path(__file__).parent.parent / ".cache" / "llm_cache.sqlite"
+DEFAULT_TTL = 30 * 86400  # seconds
+
+_lock = threading.Lock()
+_conn = None
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: float) -> Optional[str]:
+    """Key for a completion request, or None when it samples (temperature > 0)."""
+    if temperature > 0:
+        return None
+    request = json.dumps({'model': model, 'messages': messages, 'temperature': temperature},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+
+def _connection() -> sqlite3.Connection:
+    """The shared connection, opened (and the table created) on first use."""
+    global _conn
+    if _conn is None:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(CACHE_FILE), check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS replies "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+    return _conn
+
+
+def lookup(key: Optional[str]) -> Optional[str]:
+    """The cached reply for key, or None if there is none (or it has expired)."""
+    if key is None:
+        return None
+    with _lock:
+        row = _connection().execute(
+            "SELECT content FROM replies WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+    return row[0] if row else None
+
+
+def store(key: Optional[str], content: str, ttl: float = DEFAULT_TTL):
+    """Cache a reply for ttl seconds; a None key (sampled request) is ignored."""
+    if key is None:
+        return
+    with _lock:
+        conn = _connection()
+        conn.execute("INSERT OR REPLACE INTO replies VALUES (?, ?, ?)",
+                     (key, content, time.time() + ttl))
+        conn.commit()
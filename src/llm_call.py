@@ -0,0 +1,47 @@
+"""
+LLM Calls With Retry
+
+Retries a completion call on transient provider failures (rate limits,
+timeouts, dropped connections, overloaded servers) and on empty replies,
+with jittered exponential backoff, instead of failing the whole attempt.
+"""
+
+import random
+import time
+
+import litellm
+
+# Provider errors worth another attempt; anything else is raised at once
+RETRYABLE_ERRORS = (
+    litellm.RateLimitError,
+    litellm.Timeout,
+    litellm.APIConnectionError,
+    litellm.ServiceUnavailableError,
+    litellm.InternalServerError,
+)
+
+
+class EmptyResponseError(ValueError):
+    """Raised when the provider answers without any content."""
+    pass
+
+
+def call_with_retry(completion, max_attempts: int = 4, base_delay: float = 1.0, **kwargs):
+    """
+    Returns completion(**kwargs), retrying up to max_attempts times in all.
+    Attempt i waits base_delay * 2**i plus up to a second of jitter first.
+    After the last attempt the error is raised; for empty replies that is
+    EmptyResponseError, so callers never see a reply without content.
+    The completion function is passed in so callers keep their own
+    reference to it (and tests can still patch that reference).
+    """
+    for attempt in range(max_attempts):
+        try:
+            response = completion(**kwargs)
+            if not response.choices or not (response.choices[0].message.content or '').strip():
+                raise EmptyResponseError(f"Empty response from {kwargs.get('model')}")
+            return response
+        except (EmptyResponseError, *RETRYABLE_ERRORS):
+            if attempt == max_attempts - 1:
+                raise
+            time.sleep(base_delay * 2 ** attempt + random.random())
@@ -5,12 +5,12 @@ Validates Fitch proofs by calling the PHP checker.
 Takes flat JSON format (with assumeno) and validates it.
 """
 
-import json
 import subprocess
-import tempfile
 from pathlib import Path
 from typing import Dict, Any
 
+from src.fastjson import dumps as json_dumps
+
 def check_proof(proof_json: dict) -> dict:
     """
     Validates a proof using the PHP checker.
@@ -34,24 +34,18 @@ def check_proof(proof_json: dict) -> dict:
             'raw_output': '...'  # Full PHP output for debugging
         }
     """
-    # Save proof to temporary JSON file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
-        json.dump(proof_json, f, ensure_ascii=False)
-        temp_path = f.name
-    
     try:
         # Call the PHP checker
         php_script = Path(__file__).parent.parent / "test_checker.php"
         
-        # Modify the PHP script call to use our temp file
+        # The proof is piped in on stdin rather than written to a temp file
         result = subprocess.run(
-            ['php', str(php_script), temp_path],  # Pass temp_path as argument
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
+            ['php', str(php_script), 'php://stdin'],
+            input=json_dumps(proof_json),
+            capture_output=True
         )
         
-        output = result.stdout
+        output = result.stdout.decode('utf-8')
         
         # DEBUG: Print raw PHP output
         print(f"  PHP Checker Raw Output: {output}")
@@ -99,10 +93,6 @@ def check_proof(proof_json: dict) -> dict:
             'concReached': False,
             'raw_output': str(e)
         }
-    
-    finally:
-        # Clean up temp file
-        Path(temp_path).unlink(missing_ok=True)
 
 
 
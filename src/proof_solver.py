@@ -5,6 +5,11 @@ Generates Fitch-style proofs using LLMs in three experimental conditions:
 1. Baseline: One-shot "prove this"
 2. Multi-shot Generic: Multiple turns with generic "step by step" prompting
 3. Full Protocol: Staged Fitch protocol with ASCII skeletons
+
+Every completion, in all three conditions alike, goes through
+src.llm_call.call_with_retry. An empty reply is therefore retried rather
+than recorded as a turn of the conversation; if it is still empty after the
+last attempt, the whole attempt fails with "Empty response from <model>".
 """
 
 import time
@@ -14,11 +19,14 @@ import litellm
 from typing import Dict, List, Any
 from src.ascii_to_json import convert_ascii_to_json
 from src.proof_checker import check_proof
+from src.llm_call import call_with_retry
 from litellm import completion
 
 # Model configuration
 DEFAULT_PROOF_MODEL = "deepseek/deepseek-chat"
 CONVERSION_MODEL = "deepseek/deepseek-chat"
+# Model the harvest scripts test (and bank) new problems with
+HARVEST_MODEL = "deepseek/deepseek-chat"
 
 def last_proof_has_ellipses(response_text: str) -> bool:
     """Check if the LAST proof in the response has ellipses."""
@@ -69,7 +77,8 @@ Provide the complete proof in ASCII notation."""
     start_time = time.time()
     
     try:
-        response = completion(
+        response = call_with_retry(
+            completion,
             model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -122,7 +131,8 @@ Let's work through this proof step by step. What's the first step?"""
     
     for turn in range(max_turns):
         try:
-            response = completion(
+            response = call_with_retry(
+                completion,
                 model=model,
                 messages=conversation,
                 temperature=0.7,
@@ -162,7 +172,8 @@ Let's work through this proof step by step. What's the first step?"""
                         'content': 'Please provide the complete proof in clean ASCII Fitch notation.'
                     })
                     
-                    response = completion(
+                    response = call_with_retry(
+                        completion,
                         model=model,
                         messages=conversation,
                         temperature=0.7,
@@ -315,7 +326,8 @@ IMPORTANT: Provide EITHER skeleton OR complete proof, not both."""
     
     try:
         # Stage 1: Initial skeleton
-        response = completion(
+        response = call_with_retry(
+            completion,
             model=model,
             messages=conversation,
             temperature=0.7,
@@ -332,7 +344,8 @@ IMPORTANT: Provide EITHER skeleton OR complete proof, not both."""
                 final_prompt = """Please provide the complete proof in clean ASCII notation."""
                 conversation.append({'role': 'user', 'content': final_prompt})
                 
-                response = completion(
+                response = call_with_retry(
+                    completion,
                     model=model,
                     messages=conversation,
                     temperature=0.7,
@@ -363,7 +376,8 @@ If all subproofs are complete, just say "All complete - proof is finished." """
 
             conversation.append({'role': 'user', 'content': fill_prompt})
             
-            response = completion(
+            response = call_with_retry(
+                completion,
                 model=model,
                 messages=conversation,
                 temperature=0.7,
@@ -384,7 +398,8 @@ If all subproofs are complete, just say "All complete - proof is finished." """
                 'content': 'Please provide the complete proof in clean ASCII notation.'
             })
             
-            response = completion(
+            response = call_with_retry(
+                completion,
                 model=model,
                 messages=conversation,
                 temperature=0.7,
@@ -1,21 +1,30 @@
+import re
+from functools import lru_cache
+
 # Add symbol mapping to src/symbol_standardizer.py
 SYMBOL_MAP = {
     '|': 'v',  # Use 'v' instead of '∨' for Windows compatibility
-    '&': '&', 
+    '&': '&',
     '->': '->',
     '<->': '<->',
     '~': '~'
 }
 
+def _compile_substitution(mapping):
+    """One regex alternation over the symbols that actually change (longest first)."""
+    changes = {old: new for old, new in mapping.items() if old != new}
+    pattern = re.compile('|'.join(map(re.escape, sorted(changes, key=len, reverse=True))))
+    return pattern, changes
+
+_TO_STUDENT, _TO_STUDENT_TABLE = _compile_substitution(SYMBOL_MAP)
+_TO_INTERNAL, _TO_INTERNAL_TABLE = _compile_substitution({v: k for k, v in SYMBOL_MAP.items()})
+
+@lru_cache(maxsize=4096)
 def standardize_symbols(formula: str) -> str:
     """Convert internal symbols to student-friendly symbols"""
-    for internal, student_friendly in SYMBOL_MAP.items():
-        formula = formula.replace(internal, student_friendly)
-    return formula
+    return _TO_STUDENT.sub(lambda m: _TO_STUDENT_TABLE[m.group(0)], formula)
 
+@lru_cache(maxsize=4096)
 def restore_internal_symbols(formula: str) -> str:
     """Convert student symbols back to internal format for processing"""
-    reverse_map = {v: k for k, v in SYMBOL_MAP.items()}
-    for student_friendly, internal in reverse_map.items():
-        formula = formula.replace(student_friendly, internal)
-    return formula
\ No newline at end of file
+    return _TO_INTERNAL.sub(lambda m: _TO_INTERNAL_TABLE[m.group(0)], formula)
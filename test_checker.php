@@ -53,6 +53,43 @@ function buildNestedProof($flat_solution) {
     return $main_proof;
 }
 
+function runChecker($proof_data) {
+    $nested_proof = buildNestedProof($proof_data->solution);
+    return check_proof($nested_proof, count($proof_data->premises), $proof_data->conclusion);
+}
+
+// Batch mode: one JSON proof per line on stdin, one JSON verdict per line on stdout.
+// Keeps a single PHP process alive across many proofs instead of one per proof.
+if ($argc > 1 && $argv[1] === '--batch') {
+    // Warnings and checker output must not break the one-line-per-proof protocol
+    ini_set('display_errors', 'stderr');
+    while (($line = fgets(STDIN)) !== false) {
+        $proof_data = json_decode($line);
+        if ($proof_data === null) {
+            $verdict = ['valid' => false, 'issues' => ['Could not parse JSON: ' . json_last_error_msg()], 'concReached' => false];
+        } else {
+            // A malformed proof (e.g. without premises) throws; answer it and keep
+            // serving, so one bad proof does not take the batch down with it
+            ob_start();
+            try {
+                $result = runChecker($proof_data);
+                $verdict = [
+                    'valid' => empty($result->issues) && $result->concReached,
+                    'issues' => $result->issues,
+                    'concReached' => (bool)$result->concReached,
+                ];
+            } catch (Throwable $e) {
+                $verdict = ['valid' => false, 'issues' => ['Checker error: ' . $e->getMessage()], 'concReached' => false];
+            } finally {
+                ob_end_clean();
+            }
+        }
+        echo json_encode($verdict, JSON_UNESCAPED_UNICODE) . "\n";
+        fflush(STDOUT);
+    }
+    exit(0);
+}
+
 // Get filename from command line or use default
 $filename = $argc > 1 ? $argv[1] : 'test_disjunction.json';
 
@@ -69,15 +106,12 @@ if ($proof_data === null) {
     die("ERROR: Could not parse JSON. Error: " . json_last_error_msg() . "\n");
 }
 
-// Convert to nested format
-$nested_proof = buildNestedProof($proof_data->solution);
-
 // Now try to validate
 echo "=== RUNNING CHECKER ===\n";
 echo "Premises: " . implode(', ', $proof_data->premises) . "\n";
 echo "Conclusion: " . $proof_data->conclusion . "\n\n";
 
-$result = check_proof($nested_proof, count($proof_data->premises), $proof_data->conclusion);
+$result = runChecker($proof_data);
 
 echo "=== CHECKER RESULT ===\n";
 if (empty($result->issues) && $result->concReached) {
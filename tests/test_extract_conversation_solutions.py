@@ -0,0 +1,57 @@
+"""Proof extraction from the conversation logs run_experiment writes."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    from experiments.run_experiment import save_run_conversation
+except ImportError:  # the runner needs litellm (through src.proof_solver)
+    save_run_conversation = None
+
+from experiments.extract_conversation_solutions import extract_proof_from_conversation
+
+
+@unittest.skipIf(save_run_conversation is None, "run_experiment needs litellm")
+class ExtractProofFromConversationTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.conversations_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write_log(self, history):
+        result = {'problem_id': 'entailment_001', 'condition': 'protocol',
+                  'conversation_history': history}
+        return Path(self.conversations_dir) / save_run_conversation(result, self.conversations_dir)
+
+    def test_takes_proof_from_last_assistant_turn(self):
+        conv_file = self.write_log([
+            {'role': 'user', 'content': 'Prove Q from P and (P → Q).'},
+            {'role': 'assistant', 'content': 'First try:\n```\n1 | P  Pr\n```'},
+            {'role': 'user', 'content': 'Line 2 is missing.'},
+            {'role': 'assistant', 'content': 'Fixed:\n```\n1 | P  Pr\n2 | Q  →E 1\n```'},
+        ])
+        self.assertEqual(extract_proof_from_conversation(conv_file), '1 | P  Pr\n2 | Q  →E 1')
+
+    def test_skips_assistant_turns_without_a_proof(self):
+        conv_file = self.write_log([
+            {'role': 'user', 'content': 'Prove Q.'},
+            {'role': 'assistant', 'content': '```text\n1 | Q  Pr\n```'},
+            {'role': 'user', 'content': 'Are you sure?'},
+            {'role': 'assistant', 'content': 'Yes.'},
+        ])
+        self.assertEqual(extract_proof_from_conversation(conv_file), '1 | Q  Pr')
+
+    def test_ignores_code_in_user_turns(self):
+        conv_file = self.write_log([
+            {'role': 'assistant', 'content': 'No proof yet.'},
+            {'role': 'user', 'content': 'Use this format:\n```\n1 | A  Pr\n```'},
+        ])
+        self.assertIsNone(extract_proof_from_conversation(conv_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Retry and backoff behaviour of src.llm_call.call_with_retry."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    import litellm
+    from src.llm_call import EmptyResponseError, call_with_retry
+except ImportError:
+    litellm = None
+
+
+def reply(content):
+    """A completion response with a single choice holding content."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def rate_limited():
+    return litellm.RateLimitError(message='slow down', llm_provider='openai', model='m')
+
+
+@unittest.skipIf(litellm is None, "src.llm_call needs litellm")
+class CallWithRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        # No real waiting, and no jitter, so the backoff delays are exact
+        sleep_patch = mock.patch('src.llm_call.time.sleep')
+        jitter_patch = mock.patch('src.llm_call.random.random', return_value=0.0)
+        self.sleep = sleep_patch.start()
+        jitter_patch.start()
+        self.addCleanup(sleep_patch.stop)
+        self.addCleanup(jitter_patch.stop)
+
+    def test_returns_first_reply_without_waiting(self):
+        completion = mock.Mock(return_value=reply('1 | P  Pr'))
+        response = call_with_retry(completion, model='m', messages=[])
+        self.assertEqual(response.choices[0].message.content, '1 | P  Pr')
+        completion.assert_called_once_with(model='m', messages=[])
+        self.sleep.assert_not_called()
+
+    def test_retries_transient_errors_with_backoff(self):
+        completion = mock.Mock(side_effect=[rate_limited(), rate_limited(), reply('done')])
+        response = call_with_retry(completion, base_delay=1.0, model='m')
+        self.assertEqual(response.choices[0].message.content, 'done')
+        self.assertEqual(completion.call_count, 3)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1.0, 2.0])
+
+    def test_reraises_after_last_attempt(self):
+        completion = mock.Mock(side_effect=rate_limited())
+        with self.assertRaises(litellm.RateLimitError):
+            call_with_retry(completion, max_attempts=3, model='m')
+        self.assertEqual(completion.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_empty_replies_raise_empty_response_error(self):
+        for empty in (reply(''), reply('  \n'), reply(None), SimpleNamespace(choices=[])):
+            with self.subTest(response=empty):
+                completion = mock.Mock(return_value=empty)
+                with self.assertRaises(EmptyResponseError):
+                    call_with_retry(completion, max_attempts=2, model='m')
+                self.assertEqual(completion.call_count, 2)
+
+    def test_empty_reply_is_retried(self):
+        completion = mock.Mock(side_effect=[reply(''), reply('1 | P  Pr')])
+        response = call_with_retry(completion, model='m')
+        self.assertEqual(response.choices[0].message.content, '1 | P  Pr')
+
+    def test_other_errors_are_not_retried(self):
+        completion = mock.Mock(side_effect=KeyError('choices'))
+        with self.assertRaises(KeyError):
+            call_with_retry(completion, model='m')
+        completion.assert_called_once()
+        self.sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
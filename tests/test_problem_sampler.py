@@ -0,0 +1,55 @@
+"""Rule and difficulty filtering in the problem bank sampler."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from experiments.problem_sampler import ProblemSampler
+
+
+def bank_entry(problem_id, rules, line_count=3):
+    return {'id': problem_id, 'premises': ['P'], 'conclusion': 'P',
+            'metadata': {'rules_used': rules, 'line_count': line_count, 'subproof_depth': 0}}
+
+
+class ProblemSamplerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        bank_file = Path(self._tmp.name) / 'bank.jsonl'
+        bank_file.write_text('\n'.join(json.dumps(entry) for entry in [
+            bank_entry('reit', []),
+            bank_entry('mp', ['→E']),
+            bank_entry('mp_and', ['→E', '∧I'], line_count=6),
+            bank_entry('copy', [], line_count=8),
+        ]) + '\n')
+        self.sampler = ProblemSampler(str(bank_file))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def ids(self, problems):
+        return [problem['id'] for problem in problems]
+
+    def test_filter_by_rules_keeps_bank_order(self):
+        self.assertEqual(self.ids(self.sampler.filter_by_rules({'→E'})), ['reit', 'mp', 'copy'])
+        self.assertEqual(self.ids(self.sampler.filter_by_rules({'→E', '∧I'})),
+                         ['reit', 'mp', 'mp_and', 'copy'])
+
+    def test_empty_rule_set_keeps_only_rule_free_problems(self):
+        self.assertEqual(self.ids(self.sampler.filter_by_rules(set())), ['reit', 'copy'])
+        self.assertEqual(self.ids(self.sampler.sample_problems(count=None, allowed_rules=set())),
+                         ['reit', 'copy'])
+
+    def test_no_rule_set_keeps_everything(self):
+        self.assertEqual(self.ids(self.sampler.sample_problems(count=None)),
+                         ['reit', 'mp', 'mp_and', 'copy'])
+
+    def test_rules_and_difficulty_combine(self):
+        self.assertEqual(self.ids(self.sampler.sample_problems(count=None, allowed_rules=set(), max_lines=5)),
+                         ['reit'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Quiz compatibility and sampling in data/problems/quiz_sampler.py."""
+
+import contextlib
+import importlib.util
+import io
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+# The sampler lives next to the bank it reads, outside any package
+_spec = importlib.util.spec_from_file_location(
+    'quiz_sampler', Path(__file__).parent.parent / 'data' / 'problems' / 'quiz_sampler.py')
+quiz_sampler = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(quiz_sampler)
+
+
+def bank_entry(problem_id, rules, line_count=5, subproof_depth=0):
+    return {'id': problem_id, 'premises': ['(P → Q)', 'P'], 'conclusion': 'Q',
+            'metadata': {'rules_used': rules, 'line_count': line_count, 'subproof_depth': subproof_depth}}
+
+
+class QuizSamplerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.bank_file = Path(self._tmp.name) / 'bank.jsonl'
+        self.bank_file.write_text('\n'.join(json.dumps(entry, ensure_ascii=False) for entry in [
+            bank_entry('mp', ['→E']),
+            bank_entry('and_mp', ['&E', '→E']),
+            bank_entry('cp', ['→I', '→E'], subproof_depth=1),
+            bank_entry('long_mp', ['→E'], line_count=12),
+            bank_entry('neg', ['¬I', '→E'], subproof_depth=2),
+            bank_entry('odd', ['MadeUp']),
+        ]) + '\n', encoding='utf-8')
+        self.sampler = quiz_sampler.QuizSampler(str(self.bank_file))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def ids(self, problems):
+        return [problem['id'] for problem in problems]
+
+    def test_get_problems_by_quiz_type(self):
+        self.assertEqual(self.ids(self.sampler.get_problems_by_quiz_type('quiz_1')), ['mp', 'and_mp'])
+        self.assertEqual(self.ids(self.sampler.get_problems_by_quiz_type('quiz_2')),
+                         ['mp', 'and_mp', 'cp', 'long_mp'])
+        self.assertEqual(self.ids(self.sampler.get_problems_by_quiz_type('quiz_5')),
+                         ['mp', 'and_mp', 'cp', 'long_mp', 'neg'])
+        # Unknown rules fit no quiz type
+        self.assertNotIn('odd', self.ids(self.sampler.get_problems_by_quiz_type('quiz_6')))
+
+    def test_returned_problems_are_bank_entries_unchanged(self):
+        bank = [json.loads(line) for line in self.bank_file.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(list(self.sampler.get_problems_by_quiz_type('quiz_6')), bank[:5])
+
+    def test_create_progressive_quiz_set(self):
+        random.seed(0)
+        with contextlib.redirect_stdout(io.StringIO()) as warnings:
+            quizzes = self.sampler.create_progressive_quiz_set(num_per_type=2)
+
+        self.assertEqual(list(quizzes), list(self.sampler.quiz_types))
+        for quiz_type, problems in quizzes.items():
+            compatible = self.ids(self.sampler.get_problems_by_quiz_type(quiz_type))
+            self.assertEqual(len(problems), min(2, len(compatible)))
+            self.assertLessEqual(set(self.ids(problems)), set(compatible))
+            self.assertEqual(len(set(self.ids(problems))), len(problems))
+        # quiz_1 has exactly two matches, so it gets both and no warning
+        self.assertEqual(sorted(self.ids(quizzes['quiz_1'])), ['and_mp', 'mp'])
+        self.assertNotIn('quiz_1', warnings.getvalue())
+
+    def test_short_quiz_type_warns(self):
+        with contextlib.redirect_stdout(io.StringIO()) as warnings:
+            quizzes = self.sampler.create_progressive_quiz_set(num_per_type=3)
+        self.assertEqual(sorted(self.ids(quizzes['quiz_1'])), ['and_mp', 'mp'])
+        self.assertIn('Only 2 problems available for quiz_1', warnings.getvalue())
+
+    def test_export_quiz_latex(self):
+        output_file = Path(self._tmp.name) / 'quiz.tex'
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.sampler.export_quiz_latex('quiz_1', self.sampler.create_quiz('quiz_1', 1), str(output_file))
+        latex = output_file.read_text(encoding='utf-8')
+        self.assertIn('\\title{Fitch Proof Quiz: Basic \\& and $\\to$E}', latex)
+        self.assertIn('\\item $(P \\to Q), P \\vdash Q$', latex)
+        self.assertTrue(latex.endswith('\\end{document}\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Resuming an interrupted experiment and analyzing the result."""
+
+import contextlib
+import csv
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    from experiments import run_experiment as runner
+except ImportError:  # the runner needs litellm (through src.proof_solver)
+    runner = None
+
+from experiments.analyze_results import analyze_results
+
+
+def fake_solve_proof(failing=()):
+    """A solve_proof that raises for the (problem_id, condition) pairs in failing."""
+    def solve_proof(premises, conclusion, condition, model):
+        if (premises[0], condition) in failing:
+            raise RuntimeError('rate limited')
+        return {
+            'condition': condition, 'model': model, 'premises': premises, 'conclusion': conclusion,
+            'solved': True, 'time_seconds': 1.0, 'conversation_turns': 1,
+            'ascii_proof': '1 | P  Pr', 'json_proof': {},
+            'conversation_history': [{'role': 'assistant', 'content': '```\n1 | P  Pr\n```'}],
+            'error': None, 'validation': {'issues': []},
+        }
+    return solve_proof
+
+
+@unittest.skipIf(runner is None, "run_experiment needs litellm")
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self._tmp.name)
+        # Each problem's only premise is its id, so fake_solve_proof can tell them apart
+        self.problems_file = tmp / 'problems.json'
+        self.problems_file.write_text(json.dumps(
+            [{'id': pid, 'premises': [pid], 'conclusion': pid} for pid in ('p1', 'p2')]))
+        self.output_file = tmp / 'results' / 'pilot.csv'
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_quietly(self, solve_proof, **kwargs):
+        with mock.patch.object(runner, 'solve_proof', solve_proof), \
+                contextlib.redirect_stdout(io.StringIO()):
+            runner.run_experiment(str(self.problems_file), str(self.output_file),
+                                  conditions=['baseline', 'protocol'], model='m',
+                                  max_workers=2, **kwargs)
+
+    def test_resume_replaces_failed_runs(self):
+        self.run_quietly(fake_solve_proof(failing={('p1', 'baseline')}))
+        experiment_dir, = self.output_file.parent.iterdir()
+        csv_path = experiment_dir / 'results.csv'
+
+        self.run_quietly(fake_solve_proof(), resume_dir=str(experiment_dir))
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(sorted((row['problem_id'], row['condition']) for row in rows),
+                         [('p1', 'baseline'), ('p1', 'protocol'), ('p2', 'baseline'), ('p2', 'protocol')])
+        self.assertEqual([row['error'] for row in rows], [''] * 4)
+
+        report = io.StringIO()
+        with contextlib.redirect_stdout(report):
+            analyze_results(str(csv_path))
+        self.assertIn('Total runs: 4', report.getvalue())
+        self.assertEqual(report.getvalue().count('Success: 2/2 (100.0%)'), 2)
+
+    def test_unsaved_conversation_still_writes_the_result(self):
+        with mock.patch.object(runner, 'save_run_conversation', side_effect=OSError('disk full')):
+            self.run_quietly(fake_solve_proof())
+        experiment_dir, = self.output_file.parent.iterdir()
+
+        with open(experiment_dir / 'results.csv', newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row['solved'] for row in rows}, {'True'})
+        self.assertEqual({row['error'] for row in rows}, {'Conversation log not saved: disk full'})
+        # Not counted as failed runs, so a resume does not pay for them again
+        self.assertEqual(len(runner.prune_failed_runs(str(experiment_dir / 'results.csv'))), 4)
+
+    def test_resume_skips_finished_runs(self):
+        self.run_quietly(fake_solve_proof())
+        experiment_dir, = self.output_file.parent.iterdir()
+
+        solve_proof = mock.Mock(side_effect=fake_solve_proof())
+        self.run_quietly(solve_proof, resume_dir=str(experiment_dir))
+        solve_proof.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()